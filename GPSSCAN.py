@@ -11,17 +11,25 @@
 
 import os
 import sys
+import argparse
 import re
 import math
 import shutil
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, simpledialog
 from datetime import datetime
+from contextlib import contextmanager
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import NamedTuple
 import traceback
+import logging
+import hashlib
+import threading
 
 # 必要なライブラリのインポート
 try:
-    from PIL import Image, ExifTags
+    from PIL import Image, ImageTk, ExifTags
     import piexif
 except ImportError:
     print("Pillowがインストールされていません。pip install Pillowを実行してください。")
@@ -51,6 +59,12 @@ except ImportError:
     print("scikit-imageがインストールされていません。pip install scikit-imageを実行してください。")
     sys.exit(1)
 
+try:
+    from scipy.spatial import cKDTree
+except ImportError:
+    print("scipyがインストールされていません。pip install scipyを実行してください。")
+    sys.exit(1)
+
 try:
     from pyproj import Transformer
 except ImportError:
@@ -73,6 +87,97 @@ except ImportError:
     print("exifreadがインストールされていません。pip install exifreadを実行してください。")
     sys.exit(1)
 
+# 任意：numbaがあれば最近傍探索をJITコンパイルする
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+# 任意：orjsonがあれば設定ファイルの読み書きに使う
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# ログ出力（デバッグ出力は既定で抑制し、無効時は文字列の組み立ても行わない）
+log = logging.getLogger("gpsscan")
+
+# メモリ上に保持するホバー用サムネイルの最大枚数（1枚あたり約120KBのTk画像）
+HOVER_CACHE_MAX_ITEMS = 300
+
+# サムネイルのディスクキャッシュに残す最大枚数（1枚あたり10KB前後）
+THUMB_CACHE_MAX_FILES = 5000
+
+# 写真コピー時のバッファを大きくする（sendfileが使えない環境向け）
+shutil.COPY_BUFSIZE = 1024 * 1024
+
+
+def nearest_point_index(xy, qx, qy):
+    """N×2配列xyの中で(qx, qy)に最も近い点のインデックスと距離の2乗を返す"""
+    best = -1
+    best_d2 = np.inf
+    for i in range(xy.shape[0]):
+        dx = xy[i, 0] - qx
+        dy = xy[i, 1] - qy
+        d2 = dx * dx + dy * dy
+        if d2 < best_d2:
+            best_d2 = d2
+            best = i
+    return best, best_d2
+
+
+if njit is not None:
+    nearest_point_index = njit(cache=True)(nearest_point_index)
+else:
+    def nearest_point_index(xy, qx, qy):
+        """N×2配列xyの中で(qx, qy)に最も近い点のインデックスと距離の2乗を返す（NumPy版）"""
+        d2 = (xy[:, 0] - qx) ** 2 + (xy[:, 1] - qy) ** 2
+        best = int(d2.argmin())
+        return best, float(d2[best])
+
+
+def fast_copy(src, dst):
+    """ファイルをコピー（Linuxではsendfileでカーネル内コピー、メタデータは最後に1回だけ複写）"""
+    copied = False
+    if sys.platform.startswith('linux'):
+        try:
+            with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+                src_fd = fsrc.fileno()
+                size = os.fstat(src_fd).st_size
+                if hasattr(os, 'posix_fadvise'):
+                    # 先頭から順に読むことを伝えて先読みを増やしてもらう
+                    os.posix_fadvise(src_fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+                offset = 0
+                while offset < size:
+                    sent = os.sendfile(fdst.fileno(), src_fd, offset, size - offset)
+                    if sent == 0:
+                        break
+                    offset += sent
+                if hasattr(os, 'posix_fadvise'):
+                    # コピー元は再び読まないのでページキャッシュから外してよい
+                    os.posix_fadvise(src_fd, 0, 0, os.POSIX_FADV_DONTNEED)
+            copied = offset == size
+        except OSError:
+            # sendfile非対応のファイルシステムなど
+            copied = False
+    
+    if not copied:
+        shutil.copyfile(src, dst)
+    shutil.copystat(src, dst)
+
+
+class PhotoRow(NamedTuple):
+    """写真リストの1行（TreeViewの列と同じ並び）"""
+    original: str  # 元ファイル名
+    new_name: str  # 新ファイル名
+    shot_time: str  # 撮影日時
+    landscape: str  # 遠景/近景
+    x: str  # X座標
+    y: str  # Y座標
+    matching: str  # マッチングポイント
+    distance: str  # 距離
+
+
 # 日本語フォント設定
 def setup_japanese_font():
     """日本語フォントの設定"""
@@ -108,13 +213,32 @@ class GPSScanApp:
         self.root.title("測量写真リネームアプリケーション GPSSCAN")
         self.root.geometry("1400x900")
         
+        # 画面サイズ（ダイアログの中央配置用）
+        self._screen_w = self.root.winfo_screenwidth()
+        self._screen_h = self.root.winfo_screenheight()
+        
         # 日本語フォント設定
         setup_japanese_font()
         
         # データ保持用変数
         self.sim_points = []  # SIMファイルの測量点データ
+        self._sim_tree = None  # 測量点の最近傍探索用KD木
+        self._sim_origin = np.zeros(2)  # 測量点座標配列の原点（X, Yの最小値）
+        self._sim_xy = np.empty((0, 2))  # 原点からの測量点の座標配列（sim_pointsと同じ並び）
+        self._sim_by_name = {}  # 点名 → 測量点
+        self._sim_by_number = {}  # 点番 → 測量点
         self.landparcel_data = []  # 地番データ
         self.photo_gps_data = {}  # 写真のGPS/EXIF情報
+        self._new_filename_map = {}  # 元ファイル名 → 新ファイル名（写真リストの行と同期）
+        self._landscape_map = {}  # 元ファイル名 → 遠景/近景（新ファイル名がある写真のみ）
+        self._row_values = {}  # item_id → 行の値（TreeViewに問い合わせずに参照するため）
+        self._by_matching = {}  # マッチングポイント(文字列) → 遠景/近景 → {item_id}
+        self._row_key = {}  # item_id → _by_matching上の位置 (マッチングポイント, 遠景/近景)
+        self._stats = Counter()  # マッチング統計（マッチング済みの行を遠景/近景ごとに数える。行の更新ごとに増減）
+        self._item_by_name = {}  # 元ファイル名 → item_id
+        self._photo_paths = {}  # 元ファイル名 → 写真のフルパス（写真フォルダ読み込み時に作成）
+        self._seq_pat_cache = {}  # (識別子, 拡張子) → 通し番号検出用の正規表現
+        self._special_point_re = re.compile(r'基準点|引照点')  # 基準点・引照点の判定
         self.photo_directory = tk.StringVar()  # 写真フォルダパス
         self.sim_file_path = tk.StringVar()  # SIMファイルパス
         self.use_arbitrary_coordinates = tk.BooleanVar(value=False)  # 任意座標系使用フラグ
@@ -123,6 +247,7 @@ class GPSScanApp:
         self.force_point_name_for_special = tk.BooleanVar(value=True)  # 基準点・引照点は点名強制
         self.coordinate_system = tk.IntVar(value=9)  # 平面直角座標系（1～19系、デフォルト9系：東京）
         self.use_gps_conversion = tk.BooleanVar(value=True)  # GPS座標変換を使用
+        self._transformers = {}  # EPSGコード → 座標変換器（生成コストが高いためキャッシュ）
         
         # ドラッグ&ドロップ用変数
         self.dragging_photo = None
@@ -131,6 +256,8 @@ class GPSScanApp:
         self.panning = False
         self.pan_start_x = None
         self.pan_start_y = None
+        self.drag_cursor_line = None  # ドラッグ中の十字カーソル（animated=Trueで描画）
+        self._drag_motion_logged = False  # ドラッグ中のログを初回のみ出力するためのフラグ
         
         # 地図表示用変数
         self.figure = None
@@ -139,12 +266,24 @@ class GPSScanApp:
         self.current_xlim = None
         self.current_ylim = None
         self.photo_scatter = None
+        self._map_background = None  # ブリッティング用の背景（全体描画のたびに更新）
+        self._scroll_after_id = None  # ズーム後の再描画の遅延実行ID
         self.photo_points = []
+        self._photo_xy = None  # 写真位置（表示座標: 横=Y, 縦=X）
+        self._photo_display_xy = None  # 写真位置（ピクセル座標）
+        self._photo_display_key = None  # ピクセル座標を計算した時の表示範囲
         
         # マウスオーバープレビュー用
-        self.hover_annotation = None
-        self.hover_window = None
+        self.hover_window = None  # 初回表示時に作成し、以降は表示/非表示を切り替える
+        self._hover_window_shown = False
         self.last_hover_photo = None
+        self.last_tree_hover_photo = None
+        self._thumb_cache = OrderedDict()  # (パス, 更新時刻) → ホバー用サムネイル（最近使った順、HOVER_CACHE_MAX_ITEMS枚まで）
+        self.thumbnail_cache_dir = os.path.join(os.path.dirname(__file__), '.gpsscan_thumbs')  # サムネイルのディスクキャッシュ
+        self._thumb_disk_cache = False  # ディスクキャッシュが使えるか（書き込めない場合はこのセッション中は使わない）
+        self._thumb_generation = 0  # 写真フォルダ読み込みごとに増やす（古い先読みスレッドを止める）
+        self._map_hover_after_id = None  # 配置図ホバーの遅延実行ID
+        self._tree_hover_after_id = None  # 写真リストホバーの遅延実行ID
         
         # 測量図の初期表示範囲を保存
         self.initial_xlim = None
@@ -158,6 +297,9 @@ class GPSScanApp:
         self.create_menu()
         self.create_widgets()
         
+        # 最近傍探索のJITコンパイルを起動時に済ませておく（初回マウス操作での待ちを防ぐ）
+        nearest_point_index(np.zeros((1, 2)), 0.0, 0.0)
+        
     def create_menu(self):
         """メニューバーの作成"""
         menubar = tk.Menu(self.root)
@@ -536,6 +678,9 @@ class GPSScanApp:
         
         print(f"測量点: {len(self.sim_points)}点、地番: {len(self.landparcel_data)}筆 読み込み完了")
         
+        # 最近傍探索用のインデックスを構築
+        self.build_sim_index()
+        
         # 測量図の座標範囲を計算して保存
         if self.sim_points:
             x_coords = [p['X座標'] for p in self.sim_points]
@@ -552,6 +697,35 @@ class GPSScanApp:
         if self.photo_gps_data:
             self.convert_existing_photos_coordinates()
     
+    def build_sim_index(self):
+        """測量点の最近傍探索用KD木と点名・点番の対応表を構築"""
+        # 同じ点名・点番が複数ある場合は先に出現した点を優先
+        self._sim_by_name = {}
+        self._sim_by_number = {}
+        for point in self.sim_points:
+            self._sim_by_name.setdefault(point['点名'], point)
+            self._sim_by_number.setdefault(point['点番'], point)
+        
+        # 測量点の座標配列（sim_pointsと同じ並び）
+        # 平面直角座標は値が大きいため、最小値を原点にずらして保持する（距離計算での桁落ちを抑える）
+        self._sim_xy = np.array([(p['X座標'], p['Y座標']) for p in self.sim_points],
+                                dtype=np.float64).reshape(-1, 2)
+        if self.sim_points:
+            self._sim_origin = self._sim_xy.min(axis=0)
+            self._sim_xy -= self._sim_origin
+            self._sim_tree = cKDTree(self._sim_xy)
+        else:
+            self._sim_origin = np.zeros(2)
+            self._sim_tree = None
+    
+    def find_nearest_sim_point(self, x, y):
+        """測量座標(X, Y)に最も近い測量点と距離を返す"""
+        if self._sim_tree is None:
+            return None, float('inf')
+        
+        distance, index = self._sim_tree.query((x - self._sim_origin[0], y - self._sim_origin[1]))
+        return self.sim_points[index], float(distance)
+    
     def detect_coordinate_system_type(self):
         """座標系のタイプ判定（任意座標系 vs 平面直角座標系）"""
         if not self.sim_points:
@@ -643,56 +817,40 @@ class GPSScanApp:
         
         converted_count = 0
         
+        # 設定値は最初に1回だけ読む（写真ごとのループでTclに問い合わせない）
+        use_conversion = self.use_gps_conversion.get()
+        coord_system = self.coordinate_system.get()
+        use_arbitrary = self.use_arbitrary_coordinates.get()
+        
         print(f"\n[座標変換] 既存写真の座標変換を開始...")
         print(f"対象写真数: {len(self.photo_gps_data)}枚")
-        print(f"変換設定: GPS変換={'有効' if self.use_gps_conversion.get() else '無効'}, "
-              f"座標系={self.coordinate_system.get()}系, "
-              f"任意座標系={'有効' if self.use_arbitrary_coordinates.get() else '無効'}")
+        print(f"変換設定: GPS変換={'有効' if use_conversion else '無効'}, "
+              f"座標系={coord_system}系, "
+              f"任意座標系={'有効' if use_arbitrary else '無効'}")
         
-        for photo_name, exif_data in self.photo_gps_data.items():
-            # GPS情報がある場合のみ処理
+        # GPS情報がある写真の変換済み座標をクリア
+        for exif_data in self.photo_gps_data.values():
             if 'lat' in exif_data and 'lon' in exif_data:
-                lat = exif_data['lat']
-                lon = exif_data['lon']
-                
-                # 既存の変換済み座標をクリア
-                old_x = exif_data.get('x_coord', 'なし')
-                old_y = exif_data.get('y_coord', 'なし')
-                
-                if self.use_gps_conversion.get() and not self.use_arbitrary_coordinates.get():
-                    # 平面直角座標系に変換
-                    try:
-                        epsg_code = 6668 + self.coordinate_system.get()
-                        transformer = Transformer.from_crs(
-                            "EPSG:4326", 
-                            f"EPSG:{epsg_code}", 
-                            always_xy=True
-                        )
-                        y, x = transformer.transform(lon, lat)
-                        exif_data['x_coord'] = x
-                        exif_data['y_coord'] = y
-                        
-                        # 元座標も更新（復元用）
-                        exif_data['original_x_coord'] = x
-                        exif_data['original_y_coord'] = y
-                        
-                        print(f"[変換] {photo_name}: ({old_x}, {old_y}) → ({x:.3f}, {y:.3f}) [{epsg_code}系]")
-                        converted_count += 1
-                        
-                    except Exception as e:
-                        print(f"[エラー] {photo_name}: 座標変換失敗 - {e}")
-                        # 変換に失敗した場合は座標をクリア
-                        if 'x_coord' in exif_data:
-                            del exif_data['x_coord']
-                        if 'y_coord' in exif_data:
-                            del exif_data['y_coord']
-                else:
-                    # GPS変換無効または任意座標系の場合は座標をクリア
-                    if 'x_coord' in exif_data:
-                        del exif_data['x_coord']
-                    if 'y_coord' in exif_data:
-                        del exif_data['y_coord']
-                    print(f"[無効化] {photo_name}: 座標変換を無効化")
+                exif_data.pop('x_coord', None)
+                exif_data.pop('y_coord', None)
+        
+        if use_conversion and not use_arbitrary:
+            # 平面直角座標系に一括変換
+            try:
+                converted_count = self.convert_gps_coordinates(self.photo_gps_data)
+            except Exception as e:
+                print(f"[エラー] 座標変換失敗 - {e}")
+            
+            for photo_name, exif_data in self.photo_gps_data.items():
+                if 'lat' in exif_data and 'x_coord' in exif_data:
+                    # 元座標も更新（復元用）
+                    exif_data['original_x_coord'] = exif_data['x_coord']
+                    exif_data['original_y_coord'] = exif_data['y_coord']
+                    print(f"[変換] {photo_name}: → ({exif_data['x_coord']:.3f}, {exif_data['y_coord']:.3f}) "
+                          f"[{coord_system}系]")
+        else:
+            # GPS変換無効または任意座標系の場合は座標をクリアしたままにする
+            print("[無効化] 座標変換を無効化")
         
         # TreeViewを更新
         self.update_photos_treeview()
@@ -703,20 +861,138 @@ class GPSScanApp:
         if self.sim_points:
             self.update_map()
     
+    def get_transformer(self):
+        """WGS84 → 平面直角座標系の変換器を取得（系ごとにキャッシュ）"""
+        # EPSG:6669～6687（1系～19系）
+        epsg_code = 6668 + self.coordinate_system.get()
+        
+        transformer = self._transformers.get(epsg_code)
+        if transformer is None:
+            transformer = Transformer.from_crs(
+                "EPSG:4326", 
+                f"EPSG:{epsg_code}", 
+                always_xy=True
+            )
+            self._transformers[epsg_code] = transformer
+        
+        return transformer
+    
+    def convert_gps_coordinates(self, photo_data):
+        """GPS座標（緯度・経度）を平面直角座標に一括変換し、変換した枚数を返す
+        
+        PROJは1回の呼び出しごとのオーバーヘッドが大きいため、
+        1点ずつではなく配列でまとめて変換する。
+        """
+        names = [name for name, data in photo_data.items() if 'lat' in data and 'lon' in data]
+        if not names:
+            return 0
+        
+        lons = np.array([photo_data[name]['lon'] for name in names], dtype=np.float64)
+        lats = np.array([photo_data[name]['lat'] for name in names], dtype=np.float64)
+        
+        # always_xy=True のため (経度, 緯度) → (Y=東, X=北) の順
+        ys, xs = self.get_transformer().transform(lons, lats, errcheck=False)
+        
+        converted_count = 0
+        for name, x, y in zip(names, xs, ys):
+            data = photo_data[name]
+            if math.isfinite(x) and math.isfinite(y):
+                data['x_coord'] = float(x)
+                data['y_coord'] = float(y)
+                converted_count += 1
+            else:
+                # 変換に失敗した場合は座標をクリア
+                data.pop('x_coord', None)
+                data.pop('y_coord', None)
+        
+        return converted_count
+    
     def update_photos_treeview(self):
         """写真TreeViewの座標情報を更新"""
         # 既存のアイテムを更新
-        for item_id in self.photos_tree.get_children():
-            values = list(self.photos_tree.item(item_id)['values'])
-            photo_name = values[0]
+        for item_id, row in list(self._row_values.items()):
+            exif_data = self.photo_gps_data.get(row.original)
             
-            if photo_name in self.photo_gps_data:
-                exif_data = self.photo_gps_data[photo_name]
+            if exif_data is not None:
                 # X座標とY座標を更新
-                values[4] = f"{exif_data.get('x_coord', 0):.3f}" if exif_data.get('x_coord') else ""
-                values[5] = f"{exif_data.get('y_coord', 0):.3f}" if exif_data.get('y_coord') else ""
-                
-                self.photos_tree.item(item_id, values=values)
+                self.set_row(item_id, row._replace(
+                    x=f"{exif_data.get('x_coord', 0):.3f}" if exif_data.get('x_coord') else "",
+                    y=f"{exif_data.get('y_coord', 0):.3f}" if exif_data.get('y_coord') else ""
+                ))
+    
+    def add_row(self, values):
+        """写真リストに行を追加"""
+        item_id = self.photos_tree.insert('', tk.END, values=values)
+        self.index_row(item_id, values)
+        return item_id
+    
+    def set_row(self, item_id, values):
+        """写真リストの行を更新（対応表と比べて変わった列だけTreeViewに書き込む）"""
+        old_row = self._row_values.get(item_id)
+        if old_row is None:
+            self.photos_tree.item(item_id, values=values)
+        else:
+            for column, (old_value, new_value) in enumerate(zip(old_row, values)):
+                if old_value != new_value:
+                    self.photos_tree.set(item_id, column, new_value)
+        self.index_row(item_id, values)
+    
+    @contextmanager
+    def tree_bulk_update(self):
+        """写真リストの行を一旦切り離し、まとめて更新してから戻す（行ごとの再描画を避ける）"""
+        children = self.photos_tree.get_children()
+        selection = self.photos_tree.selection()
+        focus = self.photos_tree.focus()
+        scroll_top = self.photos_tree.yview()[0]
+        self.photos_tree.detach(*children)
+        try:
+            yield
+        finally:
+            # 元の並び順のまま1回の呼び出しで戻し、選択・フォーカス・スクロール位置も復元
+            self.photos_tree.set_children('', *children)
+            if selection:
+                self.photos_tree.selection_set(selection)
+            if focus:
+                self.photos_tree.focus(focus)
+            self.photos_tree.yview_moveto(scroll_top)
+    
+    def get_row(self, item_id):
+        """写真リストの行（PhotoRow）を取得（TreeViewに問い合わせず対応表から返す）"""
+        return self._row_values[item_id]
+    
+    def index_row(self, item_id, values):
+        """行の内容を対応表に反映（地図更新やファイル名生成時にTreeViewを走査しないため）"""
+        old_row = self._row_values.get(item_id)
+        
+        # マッチングポイント別の索引から古い行を外す
+        old_key = self._row_key.pop(item_id, None)
+        if old_key is not None:
+            self._by_matching[old_key[0]][old_key[1]].discard(item_id)
+        
+        # マッチングポイントは常に文字列で保持（点番が数値でも比較時に変換しなくて済むように）
+        row = PhotoRow._make(values)
+        row = row._replace(matching=str(row.matching))
+        photo_name = row.original
+        self.apply_row_delta(old_row, row)
+        self._row_values[item_id] = row
+        self._item_by_name[photo_name] = item_id
+        if row.matching:
+            self._by_matching.setdefault(row.matching, {}).setdefault(row.landscape, set()).add(item_id)
+            self._row_key[item_id] = (row.matching, row.landscape)
+        
+        if row.new_name:  # 新ファイル名がある場合のみ
+            self._new_filename_map[photo_name] = row.new_name
+            self._landscape_map[photo_name] = row.landscape
+        else:
+            self._new_filename_map.pop(photo_name, None)
+            self._landscape_map.pop(photo_name, None)
+    
+    def apply_row_delta(self, old_row, new_row):
+        """行の変更をマッチング統計に反映（古い行の分を引き、新しい行の分を足す）"""
+        for row, delta in ((old_row, -1), (new_row, 1)):
+            if row is None or not row.matching:  # マッチング済みのみ集計
+                continue
+            self._stats[row.landscape] += delta
     
     def parse_d00_landparcel(self, lines, start_index):
         """D00形式の地番データを解析（B01点番からA01座標を参照）
@@ -876,10 +1152,19 @@ class GPSScanApp:
     def load_photos(self, folder_path):
         """写真フォルダから写真情報を読み込む"""
         self.photo_gps_data = {}
+        self._photo_paths = {}
+        self._thumb_cache.clear()
         
         # TreeViewをクリア
         for item in self.photos_tree.get_children():
             self.photos_tree.delete(item)
+        self._new_filename_map.clear()
+        self._landscape_map.clear()
+        self._row_values.clear()
+        self._item_by_name.clear()
+        self._by_matching.clear()
+        self._row_key.clear()
+        self._stats.clear()
         
         # 写真ファイルを検索
         photo_extensions = ['.jpg', '.jpeg', '.png', '.tif', '.tiff']
@@ -889,22 +1174,37 @@ class GPSScanApp:
             if any(file.lower().endswith(ext) for ext in photo_extensions):
                 photo_files.append(file)
         
+        # EXIF情報取得
         for photo_file in photo_files:
             photo_path = os.path.join(folder_path, photo_file)
-            
+            self._photo_paths[photo_file] = photo_path  # listdirで見つかったパスなので存在確認は不要
+            self.photo_gps_data[photo_file] = self.extract_exif_data(photo_path)
+        
+        # ホバー用サムネイルをバックグラウンドで先に作成しておく（ディスクキャッシュが使える場合のみ）
+        self._thumb_generation += 1
+        if self.prepare_thumbnail_cache():
+            threading.Thread(
+                target=self.prefetch_thumbnails,
+                args=(list(self._photo_paths.values()), self._thumb_generation),
+                daemon=True
+            ).start()
+        
+        # GPS変換が有効な場合のみ、全写真の座標をまとめて変換
+        if self.use_gps_conversion.get():
+            try:
+                self.convert_gps_coordinates(self.photo_gps_data)
+            except Exception as e:
+                print(f"座標変換エラー: {e}")
+        
+        for photo_file, exif_data in self.photo_gps_data.items():
             try:
-                # EXIF情報取得
-                exif_data = self.extract_exif_data(photo_path)
-                
                 # 元の座標を保存（後で復元用）
                 if 'x_coord' in exif_data and 'y_coord' in exif_data:
                     exif_data['original_x_coord'] = exif_data['x_coord']
                     exif_data['original_y_coord'] = exif_data['y_coord']
                 
-                self.photo_gps_data[photo_file] = exif_data
-                
                 # TreeViewに追加
-                self.photos_tree.insert('', tk.END, values=(
+                self.add_row((
                     photo_file,  # 元ファイル名
                     "",  # 新ファイル名
                     exif_data.get('datetime', ''),  # 撮影日時
@@ -926,6 +1226,11 @@ class GPSScanApp:
         try:
             # PILでEXIF取得
             img = Image.open(photo_path)
+            
+            # 画像サイズ・ファイルサイズも保存（プレビュー時に開き直さないため）
+            exif_data['width'], exif_data['height'] = img.size
+            exif_data['file_size'] = os.path.getsize(photo_path)
+            
             exif = img._getexif()
             
             if exif:
@@ -940,32 +1245,12 @@ class GPSScanApp:
                             lat = self.get_decimal_coordinates(gps_info.get(2), gps_info.get(1))
                             lon = self.get_decimal_coordinates(gps_info.get(4), gps_info.get(3))
                             
+                            # 平面直角座標への変換は load_photos でまとめて行う
                             if lat and lon:
                                 exif_data['lat'] = lat
                                 exif_data['lon'] = lon
-                                
-                                # GPS変換が有効な場合のみ座標変換
-                                if self.use_gps_conversion.get():
-                                    try:
-                                        # 選択された系に基づいてEPSGコードを計算
-                                        # EPSG:6669～6687（1系～19系）
-                                        epsg_code = 6668 + self.coordinate_system.get()
-                                        
-                                        transformer = Transformer.from_crs(
-                                            "EPSG:4326", 
-                                            f"EPSG:{epsg_code}", 
-                                            always_xy=True
-                                        )
-                                        y, x = transformer.transform(lon, lat)
-                                        exif_data['x_coord'] = x
-                                        exif_data['y_coord'] = y
-                                        print(f"GPS座標変換: ({lat:.6f}, {lon:.6f}) → ({x:.3f}, {y:.3f}) [{epsg_code}系]")
-                                    except Exception as e:
-                                        print(f"座標変換エラー: {e}")
-                                else:
-                                    print(f"GPS変換無効: 緯度={lat:.6f}, 経度={lon:.6f} （平面直角座標への変換をスキップ）")
         except Exception as e:
-            print(f"EXIF読み込みエラー ({photo_path}): {e}")
+            log.warning("EXIF読み込みエラー (%s): %s", photo_path, e)
         
         return exif_data
     
@@ -988,15 +1273,62 @@ class GPSScanApp:
         except (TypeError, ValueError, IndexError):
             return None
     
+    def create_map_canvas(self):
+        """地図用のFigure/Axes/Canvasを作成（初回のみ）"""
+        self.figure = Figure(figsize=(8, 6))
+        self.ax = self.figure.add_subplot(111)
+        
+        self.canvas = FigureCanvasTkAgg(self.figure, self.map_frame)
+        self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        
+        # イベントハンドラー設定（キャンバスを使い回すため接続は一度だけ）
+        self.canvas.mpl_connect('button_press_event', self.on_map_click)
+        self.canvas.mpl_connect('button_release_event', self.on_map_release)
+        self.canvas.mpl_connect('motion_notify_event', self.on_map_motion)
+        self.canvas.mpl_connect('scroll_event', self.on_map_scroll)
+        self.canvas.mpl_connect('pick_event', self.on_photo_pick)  # 写真クリック検出
+        self.canvas.mpl_connect('draw_event', self.on_map_draw)  # 背景キャッシュ更新
+    
+    def on_map_draw(self, event):
+        """全体描画後に軸領域の背景を保存（ブリッティング用）"""
+        self._map_background = self.canvas.copy_from_bbox(self.ax.bbox)
+    
+    def blit_drag_cursor(self):
+        """背景を復元してドラッグカーソルのみ描画（全体の再描画を避ける）"""
+        if self._map_background is None:
+            self.canvas.draw_idle()
+            return
+        
+        self.canvas.restore_region(self._map_background)
+        if self.drag_cursor_line is not None:
+            self.ax.draw_artist(self.drag_cursor_line)
+        self.canvas.blit(self.ax.bbox)
+    
+    def remove_drag_cursor(self):
+        """ドラッグカーソルを削除（背景の復元だけで消し、全体の再描画はしない）"""
+        if self.drag_cursor_line is None:
+            return
+        
+        try:
+            self.drag_cursor_line.remove()
+            log.debug("前回のドラッグカーソルを削除しました")
+        except ValueError:
+            pass
+        self.drag_cursor_line = None
+        self.blit_drag_cursor()
+    
     def update_map(self):
         """地図を更新して表示"""
-        # 既存の図をクリア
-        if self.canvas:
-            self.canvas.get_tk_widget().destroy()
+        # キャンバスは初回のみ作成し、以降は軸をクリアして再利用
+        if self.canvas is None:
+            self.create_map_canvas()
+        else:
+            self.ax.cla()
+            self.drag_cursor_line = None
         
-        # 新しい図を作成
-        self.figure = Figure(figsize=(8, 6))
-        self.ax = self.figure.add_subplot(111)
+        # 凡例に載せるアーティスト（全アーティストの走査を避けるため明示的に渡す）
+        legend_handles = []
+        legend_labels = []
         
         # 測量点をプロット
         if self.sim_points:
@@ -1004,7 +1336,9 @@ class GPSScanApp:
             y_coords = [p['Y座標'] for p in self.sim_points]
             
             # 測量座標系：X軸=北（縦）、Y軸=東（横）→ 表示はY(横)とX(縦)を入れ替える
-            self.ax.scatter(y_coords, x_coords, c='blue', marker='o', s=50, label='測量点', zorder=3)
+            sim_scatter = self.ax.scatter(y_coords, x_coords, c='blue', marker='o', s=50, label='測量点', zorder=3)
+            legend_handles.append(sim_scatter)
+            legend_labels.append('測量点')
             
             # 点名表示
             for point in self.sim_points:
@@ -1035,8 +1369,11 @@ class GPSScanApp:
                     self.ax.fill(y_coords, x_coords, color='lightgreen', alpha=0.15, zorder=1)
                     
                     # 境界線描画
-                    self.ax.plot(y_coords, x_coords, 'g-', linewidth=1.5, 
-                               label=label, alpha=0.7, zorder=2)
+                    landparcel_line = self.ax.plot(y_coords, x_coords, 'g-', linewidth=1.5, 
+                                                   label=label, alpha=0.7, zorder=2)[0]
+                    if first_landparcel:
+                        legend_handles.append(landparcel_line)
+                        legend_labels.append('地番境界')
                     
                     # 地番名を中央に表示
                     if len(y_coords) > 1:
@@ -1059,14 +1396,8 @@ class GPSScanApp:
         self.photo_scatter = None
         photo_data = []
         
-        # TreeViewから新ファイル名を取得するためのマッピングを作成
-        new_filename_map = {}
-        for item_id in self.photos_tree.get_children():
-            values = self.photos_tree.item(item_id)['values']
-            original_name = values[0]
-            new_name = values[1]
-            if new_name:  # 新ファイル名がある場合のみ
-                new_filename_map[original_name] = new_name
+        # 新ファイル名のマッピング（行の更新時に同期済み）
+        new_filename_map = self._new_filename_map
         
         for photo_name, data in self.photo_gps_data.items():
             if 'x_coord' in data and 'y_coord' in data:
@@ -1088,6 +1419,8 @@ class GPSScanApp:
                 label='写真', zorder=4,
                 picker=15
             )
+            legend_handles.append(self.photo_scatter)
+            legend_labels.append('写真')
             
             # 新ファイル名のラベルを表示
             for photo in photo_data:
@@ -1100,6 +1433,8 @@ class GPSScanApp:
             
             # 写真データを保存（ドラッグ用）
             self.photo_points = photo_data
+            self._photo_xy = np.array([(p['y'], p['x']) for p in photo_data], dtype=np.float64)
+            self._photo_display_xy = None
         
         # 軸ラベル
         self.ax.set_xlabel('Y座標 (東)', fontsize=10)
@@ -1107,7 +1442,8 @@ class GPSScanApp:
         self.ax.set_title('測量点・写真配置図', fontsize=12)
         
         self.ax.grid(True, alpha=0.3)
-        self.ax.legend()
+        if legend_handles:
+            self.ax.legend(handles=legend_handles, labels=legend_labels, loc='best')
         self.ax.set_aspect('equal', adjustable='datalim')
         
         # 初期表示範囲を保存（初回のみ）
@@ -1121,20 +1457,11 @@ class GPSScanApp:
             self.ax.set_ylim(self.current_ylim)
         
         # キャンバスに描画
-        self.canvas = FigureCanvasTkAgg(self.figure, self.map_frame)
         self.canvas.draw()
-        self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
-        
-        # イベントハンドラー設定
-        self.canvas.mpl_connect('button_press_event', self.on_map_click)
-        self.canvas.mpl_connect('button_release_event', self.on_map_release)
-        self.canvas.mpl_connect('motion_notify_event', self.on_map_motion)
-        self.canvas.mpl_connect('scroll_event', self.on_map_scroll)
-        self.canvas.mpl_connect('pick_event', self.on_photo_pick)  # 写真クリック検出
     
     def update_map_light(self):
         """地図を軽量更新（ズーム状態を保持）"""
-        print(f"\n[DEBUG] ==== update_map_light開始 ====")
+        log.debug("==== update_map_light開始 ====")
         if not self.ax:
             self.update_map()
             return
@@ -1142,7 +1469,7 @@ class GPSScanApp:
         # 現在のズーム状態を保存
         self.current_xlim = self.ax.get_xlim()
         self.current_ylim = self.ax.get_ylim()
-        print(f"[DEBUG] ズーム状態保存: xlim={self.current_xlim}, ylim={self.current_ylim}")
+        log.debug("ズーム状態保存: xlim=%s, ylim=%s", self.current_xlim, self.current_ylim)
         
         # 既存のマーカーをクリア（測量点と地番境界は残す）
         for artist in self.ax.get_children():
@@ -1172,19 +1499,12 @@ class GPSScanApp:
         photo_labels = []  # 新ファイル名のラベル
         photo_landscapes = []  # 遠景/近景の情報
         
-        # TreeViewから新ファイル名と遠景/近景情報を取得するためのマッピングを作成
-        new_filename_map = {}
-        landscape_map = {}
-        for item_id in self.photos_tree.get_children():
-            values = self.photos_tree.item(item_id)['values']
-            original_name = values[0]
-            new_name = values[1]
-            landscape = values[3]  # 遠景/近景
-            if new_name:  # 新ファイル名がある場合のみ
-                new_filename_map[original_name] = new_name
-                landscape_map[original_name] = landscape
-        
-        print(f"[DEBUG] photo_gps_dataのエントリ数: {len(self.photo_gps_data)}")
+        # 新ファイル名と遠景/近景情報のマッピング（行の更新時に同期済み）
+        new_filename_map = self._new_filename_map
+        landscape_map = self._landscape_map
+        
+        debug = log.isEnabledFor(logging.DEBUG)
+        log.debug("photo_gps_dataのエントリ数: %d", len(self.photo_gps_data))
         for photo_name, data in self.photo_gps_data.items():
             if 'x_coord' in data and 'y_coord' in data:
                 photo_x.append(data['x_coord'])
@@ -1196,9 +1516,11 @@ class GPSScanApp:
                 photo_labels.append(new_name)
                 photo_landscapes.append(landscape)
                 
-                print(f"[DEBUG] 写真プロット: {photo_name} → X={data['x_coord']:.2f}, Y={data['y_coord']:.2f}, 新ファイル名={new_name}, 景観={landscape}")
+                if debug:
+                    log.debug("写真プロット: %s → X=%.2f, Y=%.2f, 新ファイル名=%s, 景観=%s",
+                              photo_name, data['x_coord'], data['y_coord'], new_name, landscape)
         
-        print(f"[DEBUG] プロットする写真数: {len(photo_x)}件")
+        log.debug("プロットする写真数: %d件", len(photo_x))
         if photo_x and photo_y:
             self.ax.scatter(photo_y, photo_x, c='red', marker='x', s=100, label='写真', zorder=4)
             
@@ -1224,101 +1546,74 @@ class GPSScanApp:
                                bbox=dict(boxstyle='round,pad=0.3', facecolor='white', 
                                        edgecolor=edge_color, alpha=0.7), zorder=5)
             
-            print(f"[DEBUG] 写真マーカーとラベルをプロットしました")
+            log.debug("写真マーカーとラベルをプロットしました")
         
         # ズーム状態を復元
         self.ax.set_xlim(self.current_xlim)
         self.ax.set_ylim(self.current_ylim)
-        print(f"[DEBUG] ズーム状態復元完了")
+        log.debug("ズーム状態復元完了")
         
         # 再描画
         self.canvas.draw()
-        print(f"[DEBUG] ==== update_map_light終了 ====\n")
+        log.debug("==== update_map_light終了 ====")
     
     def on_map_click(self, event):
         """地図クリックイベント"""
-        print(f"[DEBUG] on_map_click: button={event.button}, xdata={event.xdata}, ydata={event.ydata}")
+        log.debug("on_map_click: button=%s, xdata=%s, ydata=%s", event.button, event.xdata, event.ydata)
         
         if event.button == 1:  # 左クリック
             # ドラッグ開始チェック（写真選択状態）
             selected_items = self.photos_tree.selection()
-            print(f"[DEBUG] 選択された写真: {len(selected_items)}件")
-            print(f"[DEBUG] ドラッグモード: {self.drag_mode.get()} (1=リスト, 2=配置図)")
+            drag_mode = self.drag_mode.get()
+            log.debug("選択された写真: %d件", len(selected_items))
+            log.debug("ドラッグモード: %s (1=リスト, 2=配置図)", drag_mode)
             
             # ドラッグモードが写真リスト(1)の場合
-            if selected_items and self.drag_mode.get() == 1:
-                photo_name = self.photos_tree.item(selected_items[0])['values'][0]
+            if selected_items and drag_mode == 1:
+                photo_name = self.get_row(selected_items[0]).original
                 
                 # 既存のドラッグカーソルを削除
-                if hasattr(self, 'drag_cursor_line') and self.drag_cursor_line:
-                    try:
-                        self.drag_cursor_line.remove()
-                        self.canvas.draw_idle()
-                        print("[DEBUG] 前回のドラッグカーソルを削除しました")
-                    except:
-                        pass
-                    self.drag_cursor_line = None
+                self.remove_drag_cursor()
                 
                 self.dragging_photo = photo_name
                 self.drag_start_x = event.xdata
                 self.drag_start_y = event.ydata
-                print(f"[SUCCESS] 写真リストからドラッグ開始: {self.dragging_photo}")
-                print(f"[DEBUG] ドラッグ開始座標: x={self.drag_start_x}, y={self.drag_start_y}")
+                log.info("写真リストからドラッグ開始: %s", self.dragging_photo)
+                log.debug("ドラッグ開始座標: x=%s, y=%s", self.drag_start_x, self.drag_start_y)
             
             # ドラッグモードが配置図(2)の場合、クリック位置の近くに写真があるかチェック
-            elif self.drag_mode.get() == 2 and event.xdata and event.ydata:
-                print("[DEBUG] 配置図ドラッグモード: クリック位置近くの写真を探索")
+            elif drag_mode == 2 and event.xdata and event.ydata:
+                log.debug("配置図ドラッグモード: クリック位置近くの写真を探索")
                 
                 if hasattr(self, 'photo_points') and self.photo_points:
-                    # クリック位置に最も近い写真を探す
-                    min_distance = float('inf')
-                    closest_photo = None
-                    
-                    # ピクセル単位での距離を計算（画面上での距離）
-                    click_display = self.ax.transData.transform((event.xdata, event.ydata))
-                    
-                    for photo in self.photo_points:
-                        # 写真の座標をピクセルに変換
-                        photo_display = self.ax.transData.transform((photo['y'], photo['x']))
-                        
-                        # ピクセル距離を計算
-                        pixel_dist = math.sqrt(
-                            (click_display[0] - photo_display[0])**2 + 
-                            (click_display[1] - photo_display[1])**2
-                        )
-                        
-                        if pixel_dist < min_distance:
-                            min_distance = pixel_dist
-                            closest_photo = photo
+                    # クリック位置に最も近い写真を探す（ピクセル単位＝画面上での距離）
+                    click_x, click_y = self.ax.transData.transform((event.xdata, event.ydata))
+                    index, d2 = nearest_point_index(self.get_photo_display_xy(), click_x, click_y)
+                    min_distance = math.sqrt(d2)
+                    closest_photo = self.photo_points[index]
                     
                     # 30ピクセル以内の写真を選択
                     if closest_photo and min_distance < 30:
-                        print(f"[DEBUG] 写真発見: {closest_photo['name']} (距離: {min_distance:.1f}ピクセル)")
+                        log.debug("写真発見: %s (距離: %.1fピクセル)", closest_photo['name'], min_distance)
                         
                         # 既存のドラッグカーソルを削除
-                        if hasattr(self, 'drag_cursor_line') and self.drag_cursor_line:
-                            try:
-                                self.drag_cursor_line.remove()
-                                self.canvas.draw_idle()
-                            except:
-                                pass
-                            self.drag_cursor_line = None
+                        self.remove_drag_cursor()
                         
                         # ドラッグ開始
                         self.dragging_photo = closest_photo['name']
                         self.drag_start_x = event.xdata
                         self.drag_start_y = event.ydata
-                        print(f"[SUCCESS] 配置図の写真からドラッグ開始: {self.dragging_photo}")
-                        print(f"[DEBUG] ドラッグ開始座標: x={self.drag_start_x}, y={self.drag_start_y}")
+                        log.info("配置図の写真からドラッグ開始: %s", self.dragging_photo)
+                        log.debug("ドラッグ開始座標: x=%s, y=%s", self.drag_start_x, self.drag_start_y)
                     else:
-                        print(f"[INFO] クリック位置に写真なし (最短距離: {min_distance:.1f}ピクセル)")
+                        log.info("クリック位置に写真なし (最短距離: %.1fピクセル)", min_distance)
                 else:
-                    print("[INFO] 配置済み写真がありません")
+                    log.info("配置済み写真がありません")
             else:
-                print("[INFO] 写真が選択されていません")
+                log.info("写真が選択されていません")
         
         elif event.button == 3:  # 右クリック
-            print("[DEBUG] 右クリックパン開始")
+            log.debug("右クリックパン開始")
             # パン開始
             self.panning = True
             self.pan_start_x = event.xdata
@@ -1329,69 +1624,56 @@ class GPSScanApp:
     
     def on_map_release(self, event):
         """地図でマウスボタンを離した時の処理"""
-        print(f"[DEBUG] on_map_release: button={event.button}, dragging_photo={getattr(self, 'dragging_photo', None)}")
-        print(f"[DEBUG] ドロップ座標: xdata={event.xdata}, ydata={event.ydata}")
+        log.debug("on_map_release: button=%s, dragging_photo=%s", event.button, self.dragging_photo)
+        log.debug("ドロップ座標: xdata=%s, ydata=%s", event.xdata, event.ydata)
         
         if event.button == 1 and self.dragging_photo:  # 左クリック離し
-            print(f"[SUCCESS] ドラッグ終了: {self.dragging_photo}")
+            log.info("ドラッグ終了: %s", self.dragging_photo)
             
-            # ドラッグ距離を計算
-            if event.xdata and event.ydata and self.drag_start_x and self.drag_start_y:
+            # ドラッグ距離を計算（デバッグ出力時のみ）
+            if log.isEnabledFor(logging.DEBUG) and \
+               event.xdata and event.ydata and self.drag_start_x and self.drag_start_y:
                 drag_distance = math.sqrt(
                     (event.xdata - self.drag_start_x)**2 + 
                     (event.ydata - self.drag_start_y)**2
                 )
-                print(f"[DEBUG] ドラッグ距離: {drag_distance:.2f}m")
-                print(f"[DEBUG] 開始: ({self.drag_start_x:.2f}, {self.drag_start_y:.2f})")
-                print(f"[DEBUG] 終了: ({event.xdata:.2f}, {event.ydata:.2f})")
+                log.debug("ドラッグ距離: %.2fm", drag_distance)
+                log.debug("開始: (%.2f, %.2f)", self.drag_start_x, self.drag_start_y)
+                log.debug("終了: (%.2f, %.2f)", event.xdata, event.ydata)
             
             # ドラッグカーソルを削除
-            if hasattr(self, 'drag_cursor_line') and self.drag_cursor_line:
-                try:
-                    self.drag_cursor_line.remove()
-                    self.canvas.draw_idle()
-                except:
-                    pass
-                self.drag_cursor_line = None
+            self.remove_drag_cursor()
             
             # ドラッグ中の写真名を保存（ダイアログで使用）
             dragging_photo_name = self.dragging_photo
             
             # ドラッグ&ドロップ完了
             if event.xdata and event.ydata:
-                # 最も近い測量点を探す
-                min_distance = float('inf')
-                matched_point = None
-                
                 # 座標系変換：表示座標(Y, X) → 測量座標(X, Y)
                 drop_x = event.ydata
                 drop_y = event.xdata
                 
-                for point in self.sim_points:
-                    distance = math.sqrt((point['X座標'] - drop_x) ** 2 + 
-                                       (point['Y座標'] - drop_y) ** 2)
-                    if distance < min_distance:
-                        min_distance = distance
-                        matched_point = point
+                # 最も近い測量点を探す
+                matched_point, min_distance = self.find_nearest_sim_point(drop_x, drop_y)
                 
                 # ドラッグ状態を先にリセット（ダイアログ表示前）
                 self.dragging_photo = None
                 self.drag_start_x = None
                 self.drag_start_y = None
-                print("ドラッグ状態をリセットしました")
+                log.debug("ドラッグ状態をリセットしました")
                 
                 if matched_point and min_distance < 50:  # 50m以内
-                    print(f"マッチング成功: {matched_point['点名']} (距離: {min_distance:.2f}m)")
+                    log.info("マッチング成功: %s (距離: %.2fm)", matched_point['点名'], min_distance)
                     # 遠景/近景選択ダイアログ
                     self.show_landscape_dialog(dragging_photo_name, matched_point, min_distance)
                 else:
-                    print(f"マッチング失敗: 最短距離 {min_distance:.2f}m (50m以内の点がありません)")
+                    log.info("マッチング失敗: 最短距離 %.2fm (50m以内の点がありません)", min_distance)
             else:
                 # マウスが地図外で離された場合
                 self.dragging_photo = None
                 self.drag_start_x = None
                 self.drag_start_y = None
-                print("地図外でドロップ、ドラッグ状態をリセット")
+                log.debug("地図外でドロップ、ドラッグ状態をリセット")
         
         elif event.button == 3:  # 右クリック離し
             self.panning = False
@@ -1400,6 +1682,11 @@ class GPSScanApp:
     
     def on_map_motion(self, event):
         """地図上でマウス移動（パン操作 + ドラッグ + マウスオーバープレビュー）"""
+        # 保留中のホバー処理を取り消す（最後のイベントのみ処理する）
+        if self._map_hover_after_id is not None:
+            self.root.after_cancel(self._map_hover_after_id)
+            self._map_hover_after_id = None
+        
         # パン操作中（右クリックドラッグ）
         if self.panning:
             if event.xdata is not None and event.ydata is not None and \
@@ -1432,55 +1719,54 @@ class GPSScanApp:
                 
                 # 移動後の開始位置を更新
                 self.pan_start_display = current_display
+                self._map_background = None  # 表示範囲が変わったため保存済みの背景は使えない
                 
-                # キャンバスを更新
-                self.canvas.draw()
+                # キャンバスを更新（表示範囲が変わるため全体描画、連続イベントはまとめる）
+                self.canvas.draw_idle()
             return
         
         # 写真ドラッグ中（左クリックドラッグ）
         if self.dragging_photo:
             # 初回のみログ出力（頻繁なログを避ける）
-            if not hasattr(self, '_drag_motion_logged'):
-                print(f"[DEBUG] ドラッグ中: {self.dragging_photo}, x={event.xdata}, y={event.ydata}")
+            if not self._drag_motion_logged:
+                log.debug("ドラッグ中: %s, x=%s, y=%s", self.dragging_photo, event.xdata, event.ydata)
                 self._drag_motion_logged = True
             
             self.hide_hover_preview()
             
             # ドラッグ中の視覚フィードバック：現在位置にカーソル表示
             if event.xdata and event.ydata:
-                # 既存のカーソルを削除
-                if hasattr(self, 'drag_cursor_line') and self.drag_cursor_line:
-                    try:
-                        self.drag_cursor_line.remove()
-                    except:
-                        pass
-                
-                # 新しいカーソルを描画（十字）
-                self.drag_cursor_line = self.ax.plot(
-                    [event.xdata], [event.ydata], 
-                    'r+', markersize=15, markeredgewidth=2
-                )[0]
-                self.canvas.draw_idle()
+                if self.drag_cursor_line is None:
+                    # カーソルを作成（十字）。通常の描画対象から外し、ブリッティングで描く
+                    self.drag_cursor_line = self.ax.plot(
+                        [event.xdata], [event.ydata], 
+                        'r+', markersize=15, markeredgewidth=2,
+                        animated=True
+                    )[0]
+                else:
+                    # 既存のカーソルを移動
+                    self.drag_cursor_line.set_data([event.xdata], [event.ydata])
                 
-                # カーソル描画確認（初回のみ）
-                if not hasattr(self, '_cursor_drawn_logged'):
-                    print(f"[DEBUG] 赤い十字カーソルを描画しました: ({event.xdata:.2f}, {event.ydata:.2f})")
-                    self._cursor_drawn_logged = True
+                self.blit_drag_cursor()
             
             return
         else:
             # ドラッグ中でない場合はフラグをリセット
-            if hasattr(self, '_drag_motion_logged'):
-                del self._drag_motion_logged
-            if hasattr(self, '_cursor_drawn_logged'):
-                del self._cursor_drawn_logged
+            self._drag_motion_logged = False
         
-        # マウスオーバープレビュー
+        # マウスオーバープレビュー（40ms間動きが止まった時だけ探索）
         if event.inaxes == self.ax and event.xdata and event.ydata:
-            self.show_hover_preview(event)
+            self._map_hover_after_id = self.root.after(
+                40, lambda e=event: self.on_map_hover_timer(e)
+            )
         else:
             self.hide_hover_preview()
     
+    def on_map_hover_timer(self, event):
+        """遅延実行されたマウスオーバープレビュー"""
+        self._map_hover_after_id = None
+        self.show_hover_preview(event)
+    
     def on_map_scroll(self, event):
         """マウスホイールでズーム"""
         if event.xdata and event.ydata:
@@ -1499,99 +1785,237 @@ class GPSScanApp:
             
             self.ax.set_xlim(new_xlim)
             self.ax.set_ylim(new_ylim)
+            self._map_background = None  # 表示範囲が変わったため保存済みの背景は使えない
             
-            self.canvas.draw()
+            # 連続したホイール操作の再描画は30ms後にまとめて1回だけ行う
+            if self._scroll_after_id is not None:
+                self.root.after_cancel(self._scroll_after_id)
+            self._scroll_after_id = self.root.after(30, self.on_map_scroll_timer)
+    
+    def on_map_scroll_timer(self):
+        """遅延実行されたズーム後の再描画"""
+        self._scroll_after_id = None
+        self.canvas.draw_idle()
     
     def show_hover_preview(self, event):
         """マウスオーバーで写真プレビュー表示"""
         if not hasattr(self, 'photo_points') or not self.photo_points:
             return
         
-        # マウスに最も近い写真を探す
-        min_dist = 20  # ピクセル単位
-        closest_photo = None
-        
-        for photo in self.photo_points:
-            # データ座標 → ディスプレイ座標
-            display_x, display_y = self.ax.transData.transform((photo['y'], photo['x']))
-            mouse_x, mouse_y = self.ax.transData.transform((event.xdata, event.ydata))
-            
-            dist = math.sqrt((display_x - mouse_x)**2 + (display_y - mouse_y)**2)
-            
-            if dist < min_dist:
-                min_dist = dist
-                closest_photo = photo
+        # マウスに最も近い写真を探す（20ピクセル以内）
+        mouse_x, mouse_y = self.ax.transData.transform((event.xdata, event.ydata))
+        index, d2 = nearest_point_index(self.get_photo_display_xy(), mouse_x, mouse_y)
+        closest_photo = self.photo_points[index] if d2 < 20 ** 2 else None
         
         # 前回と同じ写真ならスキップ
-        if hasattr(self, 'last_hover_photo') and closest_photo and \
-           self.last_hover_photo == closest_photo['name']:
+        if closest_photo and self.last_hover_photo == closest_photo['name']:
             return
         
         # プレビュー更新
         if closest_photo:
             self.last_hover_photo = closest_photo['name']
-            self.display_hover_window(closest_photo['name'], event)
+            self.display_hover_window(closest_photo['name'])
         else:
             self.hide_hover_preview()
     
-    def display_hover_window(self, photo_name, event):
-        """ホバー用の小さなプレビューウィンドウを表示"""
-        # 既存のウィンドウを閉じる
-        if self.hover_window and self.hover_window.winfo_exists():
-            self.hover_window.destroy()
+    def get_photo_display_xy(self):
+        """写真位置のピクセル座標を取得（表示範囲が変わった時のみ再計算）
         
-        photo_path = os.path.join(self.photo_directory.get(), photo_name)
+        パン・ズームのたびに変わるため、KD木を作り直すより
+        配列の線形探索（nearest_point_index）の方が速い。
+        """
+        view_key = (self.ax.get_xlim(), self.ax.get_ylim(), self.ax.bbox.bounds)
         
-        if not os.path.exists(photo_path):
+        if self._photo_display_xy is None or self._photo_display_key != view_key:
+            self._photo_display_xy = self.ax.transData.transform(self._photo_xy)
+            self._photo_display_key = view_key
+        
+        return self._photo_display_xy
+    
+    def create_hover_window(self):
+        """ホバー用プレビューウィンドウを作成（非表示のまま保持して使い回す）"""
+        self.hover_window = tk.Toplevel(self.root)
+        self.hover_window.withdraw()
+        self.hover_window.overrideredirect(True)  # タイトルバーなし
+        self.hover_window.attributes('-topmost', True)
+        
+        # フレーム（境界線付き）
+        frame = tk.Frame(self.hover_window, bg="black", padx=2, pady=2)
+        frame.pack()
+        
+        self.hover_image_label = tk.Label(frame, bg="white")
+        self.hover_image_label.pack()
+        
+        # ファイル名表示
+        self.hover_name_label = tk.Label(frame, bg="lightyellow", font=("", 8))
+        self.hover_name_label.pack(fill=tk.X)
+    
+    def display_hover_window(self, photo_name):
+        """ホバー用の小さなプレビューウィンドウを表示（配置図・写真リスト共通）"""
+        photo_path = self._photo_paths.get(photo_name)
+        if photo_path is None:
+            self.withdraw_hover_window()
             return
         
         try:
-            # 小さなプレビューウィンドウ
-            self.hover_window = tk.Toplevel(self.root)
-            self.hover_window.overrideredirect(True)  # タイトルバーなし
-            self.hover_window.attributes('-topmost', True)
-            
-            # マウス位置から少しオフセット
-            x, y = self.root.winfo_pointerxy()
-            self.hover_window.geometry(f"+{x+15}+{y+15}")
-            
-            # 画像読み込み
-            img = Image.open(photo_path)
-            img.thumbnail((200, 150), Image.LANCZOS)
-            
-            from PIL import ImageTk
-            photo = ImageTk.PhotoImage(img)
-            
-            # フレーム（境界線付き）
-            frame = tk.Frame(self.hover_window, bg="black", padx=2, pady=2)
-            frame.pack()
-            
-            label = tk.Label(frame, image=photo, bg="white")
-            label.image = photo
-            label.pack()
-            
-            # ファイル名表示
-            name_label = tk.Label(frame, text=photo_name, bg="lightyellow", 
-                                 font=("", 8))
-            name_label.pack(fill=tk.X)
-            
+            # 画像読み込み（キャッシュ済みサムネイルを使用）
+            photo = self.get_hover_photo(photo_path)
+        except FileNotFoundError:
+            # 読み込み後に削除された写真
+            self.withdraw_hover_window()
+            return
         except Exception as e:
-            print(f"ホバープレビューエラー: {e}")
-            if self.hover_window:
-                self.hover_window.destroy()
-                self.hover_window = None
+            log.warning("ホバープレビューエラー: %s", e)
+            self.withdraw_hover_window()
+            return
+        
+        if self.hover_window is None:
+            self.create_hover_window()
+        
+        # 画像とファイル名を差し替えるだけで、ウィジェットは作り直さない
+        self.hover_image_label.configure(image=photo)
+        self.hover_image_label.image = photo
+        self.hover_name_label.configure(text=photo_name)
+        
+        # マウス位置から少しオフセット
+        x, y = self.root.winfo_pointerxy()
+        self.hover_window.geometry(f"+{x+15}+{y+15}")
+        
+        if not self._hover_window_shown:
+            self.hover_window.deiconify()
+            self._hover_window_shown = True
+    
+    def withdraw_hover_window(self):
+        """ホバー用プレビューウィンドウを隠す（破棄はしない）"""
+        if self._hover_window_shown:
+            self.hover_window.withdraw()
+            self._hover_window_shown = False
+    
+    def get_hover_photo(self, photo_path):
+        """ホバー用サムネイルを取得（パスと更新時刻をキーにキャッシュ）"""
+        key = (photo_path, os.path.getmtime(photo_path))
+        photo = self._thumb_cache.get(key)
+        
+        if photo is None:
+            img = self.get_thumbnail(photo_path)
+            photo = ImageTk.PhotoImage(img)
+            self._thumb_cache[key] = photo
+            # Tkの画像メモリを抑えるため、しばらく使っていないものから捨てる
+            if len(self._thumb_cache) > HOVER_CACHE_MAX_ITEMS:
+                self._thumb_cache.popitem(last=False)
+        else:
+            self._thumb_cache.move_to_end(key)
+        
+        return photo
+    
+    def prepare_thumbnail_cache(self):
+        """サムネイルのディスクキャッシュ用フォルダを用意（作成できなければディスクキャッシュを無効にする）"""
+        if self._thumb_disk_cache:
+            return True
+        
+        try:
+            os.makedirs(self.thumbnail_cache_dir, exist_ok=True)
+        except OSError as e:
+            log.warning("サムネイルキャッシュを無効にします (%s): %s", self.thumbnail_cache_dir, e)
+            return False
+        
+        self._thumb_disk_cache = True
+        return True
+    
+    def prune_thumbnail_cache(self, max_files=THUMB_CACHE_MAX_FILES):
+        """ディスクキャッシュのサムネイルを新しい順にmax_files枚まで残し、残りと取り残された一時ファイルを削除"""
+        try:
+            with os.scandir(self.thumbnail_cache_dir) as it:
+                entries = [entry for entry in it if entry.is_file()]
+        except OSError:
+            return
+        
+        thumbs = []
+        stale_before = datetime.now().timestamp() - 3600  # 書き込み中の一時ファイルは消さない
+        for entry in entries:
+            try:
+                mtime = entry.stat().st_mtime
+                if entry.name.endswith('.tmp'):
+                    if mtime < stale_before:
+                        os.remove(entry.path)
+                else:
+                    thumbs.append((mtime, entry.path))
+            except OSError:
+                pass
+        
+        thumbs.sort(reverse=True)
+        for _, path in thumbs[max_files:]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+    
+    def get_thumbnail(self, photo_path):
+        """200×150のサムネイル画像を取得（ディスクキャッシュがあればそれを読む）
+        
+        Tkを操作しないため、バックグラウンドスレッドからも呼び出せる。
+        """
+        use_disk_cache = self._thumb_disk_cache
+        if use_disk_cache:
+            st = os.stat(photo_path)
+            key = hashlib.blake2b(
+                f"{photo_path}|{st.st_mtime_ns}|{st.st_size}".encode('utf-8'), digest_size=8
+            ).hexdigest()
+            cache_path = os.path.join(self.thumbnail_cache_dir, key + ".jpg")
+            
+            # キャッシュ済みなら小さなファイルを読むだけ
+            if os.path.exists(cache_path):
+                img = Image.open(cache_path)
+                img.load()
+                return img
+        
+        img = Image.open(photo_path)
+        # JPEGは縮小デコードで読み込む（目標の2倍を指定し、1/2〜1/8の縮小をlibjpegに選ばせる）
+        img.draft("RGB", (400, 300))
+        img.thumbnail((200, 150), Image.BILINEAR)  # 一瞬表示するだけなので軽いフィルタで十分
+        if img.mode not in ("RGB", "L"):
+            img = img.convert("RGB")
+        
+        if not use_disk_cache:
+            return img
+        
+        # 一時ファイルに書いてから置き換える（先読みスレッドとの同時書き込み対策）
+        tmp_path = f"{cache_path}.{threading.get_ident()}.tmp"
+        try:
+            img.save(tmp_path, "JPEG", quality=85)
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            # 書き込めない場合は写真ごとに失敗し続けないよう、このセッション中はディスクキャッシュを使わない
+            if self._thumb_disk_cache:
+                self._thumb_disk_cache = False
+                log.warning("サムネイルキャッシュ保存エラーのためキャッシュを無効にします (%s): %s", photo_path, e)
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+        
+        return img
+    
+    def prefetch_thumbnails(self, photo_paths, generation):
+        """サムネイルを先に作成してディスクキャッシュに保存（バックグラウンドスレッド）"""
+        # 古いサムネイルを削除してキャッシュの大きさを抑える
+        self.prune_thumbnail_cache()
+        
+        for photo_path in photo_paths:
+            # ディスクキャッシュが無効になったら作っても捨てるだけなので中断
+            if not self._thumb_disk_cache:
+                return
+            # 別のフォルダが読み込まれた場合も中断
+            if generation != self._thumb_generation:
+                return
+            try:
+                self.get_thumbnail(photo_path)
+            except Exception as e:
+                log.debug("サムネイル先読みエラー (%s): %s", photo_path, e)
     
     def hide_hover_preview(self):
         """ホバープレビューを非表示"""
-        if hasattr(self, 'hover_annotation') and self.hover_annotation:
-            self.hover_annotation.remove()
-            self.hover_annotation = None
-            self.canvas.draw_idle()
-        
-        if hasattr(self, 'hover_window') and self.hover_window and \
-           self.hover_window.winfo_exists():
-            self.hover_window.destroy()
-            self.hover_window = None
+        self.withdraw_hover_window()
         
         self.last_hover_photo = None
     
@@ -1628,128 +2052,78 @@ class GPSScanApp:
             return
         
         # 行のデータを取得
-        values = self.photos_tree.item(item, 'values')
-        if not values:
-            self.hide_tree_hover_preview()
-            return
-        
-        photo_name = values[0]  # 元ファイル名
+        photo_name = self.get_row(item).original  # 元ファイル名
         
         # 前回と同じ写真ならスキップ
-        if hasattr(self, 'last_tree_hover_photo') and \
-           self.last_tree_hover_photo == photo_name:
+        if self.last_tree_hover_photo == photo_name:
             return
         
-        # プレビュー表示
+        # 一定時間（150ms）止まった時だけプレビュー表示（素早く通過した行では画像を読まない）
         self.last_tree_hover_photo = photo_name
-        self.display_tree_hover_window(photo_name)
+        self.cancel_tree_hover_timer()
+        self._tree_hover_after_id = self.root.after(
+            150, lambda p=photo_name: self.on_tree_hover_timer(p)
+        )
+    
+    def on_tree_hover_timer(self, photo_name):
+        """遅延実行された写真リストのホバープレビュー"""
+        self._tree_hover_after_id = None
+        self.display_hover_window(photo_name)
+    
+    def cancel_tree_hover_timer(self):
+        """写真リストのホバー遅延表示を取り消す"""
+        if self._tree_hover_after_id is not None:
+            self.root.after_cancel(self._tree_hover_after_id)
+            self._tree_hover_after_id = None
     
     def on_tree_leave(self, event):
         """写真リストからマウスが離れた時"""
         self.hide_tree_hover_preview()
     
-    def display_tree_hover_window(self, photo_name):
-        """写真リスト用のホバープレビューウィンドウを表示"""
-        # 既存のウィンドウを閉じる
-        if hasattr(self, 'tree_hover_window') and self.tree_hover_window and \
-           self.tree_hover_window.winfo_exists():
-            self.tree_hover_window.destroy()
-        
-        photo_path = os.path.join(self.photo_directory.get(), photo_name)
-        
-        if not os.path.exists(photo_path):
-            return
-        
-        try:
-            # 小さなプレビューウィンドウ
-            self.tree_hover_window = tk.Toplevel(self.root)
-            self.tree_hover_window.overrideredirect(True)  # タイトルバーなし
-            self.tree_hover_window.attributes('-topmost', True)
-            
-            # マウス位置から少しオフセット
-            x, y = self.root.winfo_pointerxy()
-            self.tree_hover_window.geometry(f"+{x+15}+{y+15}")
-            
-            # 画像読み込み
-            img = Image.open(photo_path)
-            img.thumbnail((200, 150), Image.LANCZOS)
-            
-            from PIL import ImageTk
-            photo = ImageTk.PhotoImage(img)
-            
-            # フレーム（境界線付き）
-            frame = tk.Frame(self.tree_hover_window, bg="black", padx=2, pady=2)
-            frame.pack()
-            
-            label = tk.Label(frame, image=photo, bg="white")
-            label.image = photo
-            label.pack()
-            
-            # ファイル名表示
-            name_label = tk.Label(frame, text=photo_name, bg="lightyellow", 
-                                 font=("", 8))
-            name_label.pack(fill=tk.X)
-            
-        except Exception as e:
-            print(f"写真リストホバープレビューエラー: {e}")
-            if hasattr(self, 'tree_hover_window') and self.tree_hover_window:
-                self.tree_hover_window.destroy()
-                self.tree_hover_window = None
-    
     def hide_tree_hover_preview(self):
         """写真リスト用のホバープレビューを非表示"""
-        if hasattr(self, 'tree_hover_window') and self.tree_hover_window and \
-           self.tree_hover_window.winfo_exists():
-            self.tree_hover_window.destroy()
-            self.tree_hover_window = None
+        self.cancel_tree_hover_timer()
+        self.withdraw_hover_window()
         
-        if hasattr(self, 'last_tree_hover_photo'):
-            self.last_tree_hover_photo = None
+        self.last_tree_hover_photo = None
     
     def on_photo_pick(self, event):
         """地図上の写真（×印）がクリックされた時"""
-        print(f"[DEBUG] on_photo_pick: button={event.mouseevent.button}, ind={event.ind}")
-        print(f"[DEBUG] ドラッグモード: {self.drag_mode.get()} (1=リスト, 2=配置図)")
+        log.debug("on_photo_pick: button=%s, ind=%s", event.mouseevent.button, event.ind)
+        log.debug("ドラッグモード: %s (1=リスト, 2=配置図)", self.drag_mode.get())
         
         if event.mouseevent.button != 1:  # 左クリックのみ
-            print("[INFO] 左クリック以外なので無視")
+            log.info("左クリック以外なので無視")
             return
         
         # ドラッグモードが配置図(2)の場合のみ処理
         if self.drag_mode.get() != 2:
-            print("[INFO] 配置図からのドラッグモードが選択されていません")
+            log.info("配置図からのドラッグモードが選択されていません")
             return
         
         # クリックされた写真を特定
         ind = event.ind[0]
-        print(f"[DEBUG] photo_pointsの数: {len(self.photo_points) if hasattr(self, 'photo_points') else 0}")
+        log.debug("photo_pointsの数: %d", len(self.photo_points) if hasattr(self, 'photo_points') else 0)
         
         if hasattr(self, 'photo_points') and ind < len(self.photo_points):
             clicked_photo = self.photo_points[ind]
-            print(f"[DEBUG] クリックされた写真: {clicked_photo}")
+            log.debug("クリックされた写真: %s", clicked_photo)
             
             # 既存のドラッグカーソルを削除
-            if hasattr(self, 'drag_cursor_line') and self.drag_cursor_line:
-                try:
-                    self.drag_cursor_line.remove()
-                    self.canvas.draw_idle()
-                    print("[DEBUG] 前回のドラッグカーソルを削除しました")
-                except:
-                    pass
-                self.drag_cursor_line = None
+            self.remove_drag_cursor()
             
             # ドラッグ開始
             self.dragging_photo = clicked_photo['name']
             self.drag_start_x = event.mouseevent.xdata
             self.drag_start_y = event.mouseevent.ydata
             
-            print(f"[SUCCESS] 地図上の写真（×）からドラッグ開始: {self.dragging_photo}")
-            print(f"[DEBUG] ドラッグ開始座標: x={self.drag_start_x}, y={self.drag_start_y}")
+            log.info("地図上の写真（×）からドラッグ開始: %s", self.dragging_photo)
+            log.debug("ドラッグ開始座標: x=%s, y=%s", self.drag_start_x, self.drag_start_y)
             
             # ホバープレビューを非表示
             self.hide_hover_preview()
         else:
-            print(f"[ERROR] photo_pointsが存在しないか、インデックスが範囲外です")
+            log.error("photo_pointsが存在しないか、インデックスが範囲外です")
     
     def show_landscape_dialog(self, photo_name, matched_point, matched_point_distance):
         """遠景/近景選択ダイアログ"""
@@ -1758,7 +2132,7 @@ class GPSScanApp:
         # ダイアログ作成
         landscape_dialog = tk.Toplevel(self.root)
         landscape_dialog.title("遠景/近景の選択")
-        landscape_dialog.geometry("450x280")
+        self.center_dialog(landscape_dialog, 450, 280)  # サイズと画面中央の位置を設定
         landscape_dialog.transient(self.root)
         landscape_dialog.grab_set()
         
@@ -1773,7 +2147,7 @@ class GPSScanApp:
         
         # 基準点・引照点チェック
         point_name = matched_point.get('点名', '').strip()
-        if '基準点' in point_name or '引照点' in point_name:
+        if self._special_point_re.search(point_name):
             is_special_point.set(True)
         
         ttk.Label(landscape_dialog, text="写真の種類を選択してください:", font=("", 10, "bold")).pack(pady=10)
@@ -1798,19 +2172,15 @@ class GPSScanApp:
             original_filename = photo_name
             new_filename = self.create_filename(identifier, original_filename, photo_landscape, matched_point)
             
-            # TreeViewで写真を探して更新
-            for item_id in self.photos_tree.get_children():
-                values = self.photos_tree.item(item_id)['values']
-                if values[0] == photo_name:
-                    # データを更新
-                    values = list(values)
-                    values[1] = new_filename  # 新ファイル名
-                    values[3] = photo_landscape  # 遠景/近景を更新
-                    values[6] = identifier  # マッチングポイント
-                    values[7] = f"{matched_point_distance:.1f}m"  # 距離
-                    
-                    self.photos_tree.item(item_id, values=values)
-                    break
+            # TreeViewで写真の行を探して更新
+            item_id = self._item_by_name.get(photo_name)
+            if item_id is not None:
+                self.set_row(item_id, self.get_row(item_id)._replace(
+                    new_name=new_filename,  # 新ファイル名
+                    landscape=photo_landscape,  # 遠景/近景を更新
+                    matching=identifier,  # マッチングポイント
+                    distance=f"{matched_point_distance:.1f}m"  # 距離
+                ))
             
             # GPS座標も更新
             if photo_name in self.photo_gps_data:
@@ -1827,262 +2197,181 @@ class GPSScanApp:
         
         ttk.Button(landscape_dialog, text="OK", command=confirm_landscape).pack(pady=10)
         
-        # ダイアログを中央に配置
-        landscape_dialog.update_idletasks()
-        x = (landscape_dialog.winfo_screenwidth() // 2) - (landscape_dialog.winfo_width() // 2)
-        y = (landscape_dialog.winfo_screenheight() // 2) - (landscape_dialog.winfo_height() // 2)
-        landscape_dialog.geometry(f"+{x}+{y}")
-        
         landscape_dialog.focus_set()
         landscape_dialog.grab_set()
         landscape_dialog.wait_window()
     
-    def create_filename(self, identifier, original_filename, landscape_type, point_data=None):
-        """新しいファイル名を生成（新規写真が-1/-2、既存写真を通し番号に変更）"""
-        print(f"\n[DEBUG] ==== create_filename開始 ====")
-        print(f"[DEBUG] identifier: {identifier}")
-        print(f"[DEBUG] original_filename: {original_filename}")
-        print(f"[DEBUG] landscape_type: {landscape_type}")
+    def create_filename(self, identifier, original_filename, landscape_type, point_data=None,
+                        force_special=None, use_suffix=None):
+        """新しいファイル名を生成（新規写真が-1/-2、既存写真を通し番号に変更）
+        
+        force_special/use_suffixを省略した場合は画面の設定を読む（連続呼び出し時は呼び出し側で1回だけ読んで渡す）
+        """
+        if force_special is None:
+            force_special = self.force_point_name_for_special.get()
+        if use_suffix is None:
+            use_suffix = self.use_landscape_suffix.get()
+        
+        log.debug("==== create_filename開始 ====")
+        log.debug("identifier: %s", identifier)
+        log.debug("original_filename: %s", original_filename)
+        log.debug("landscape_type: %s", landscape_type)
         
         name, ext = os.path.splitext(original_filename)
         
         # 基準点・引照点かどうかをチェック
         is_special_point = False
-        if point_data is not None and self.force_point_name_for_special.get():
+        if point_data is not None and force_special:
             point_name = point_data.get('点名', '').strip()
-            if '基準点' in point_name or '引照点' in point_name:
+            if self._special_point_re.search(point_name):
                 is_special_point = True
                 identifier = point_name
-                print(f"[DEBUG] 基準点/引照点検出: identifier変更 → {identifier}")
+                log.debug("基準点/引照点検出: identifier変更 → %s", identifier)
         
         # 遠景/近景サフィックスを使用する場合
-        if self.use_landscape_suffix.get():
-            print(f"[DEBUG] 遠景/近景サフィックス使用モード")
+        if use_suffix:
+            log.debug("遠景/近景サフィックス使用モード")
             if landscape_type == "不明":
                 landscape_type = "近景"
-                print(f"[DEBUG] 景観タイプ不明 → 近景に設定")
+                log.debug("景観タイプ不明 → 近景に設定")
             
             suffix = "-1" if landscape_type == "遠景" else "-2"
             base_filename = f"{identifier}{suffix}{ext}"
-            print(f"[DEBUG] 基本ファイル名: {base_filename}")
+            log.debug("基本ファイル名: %s", base_filename)
             
             # 同じ測量点・同じ景観タイプの既存写真を収集
             existing_photos = []
-            print(f"[DEBUG] 既存写真を収集中...")
-            print(f"[DEBUG] 検索条件: identifier='{identifier}' (型:{type(identifier).__name__}), landscape_type='{landscape_type}'")
-            
-            for item_id in self.photos_tree.get_children():
-                values = self.photos_tree.item(item_id)['values']
-                current_original = values[0]
-                current_new = values[1]
-                current_matching = values[6]
-                current_landscape = values[3]
-                
-                # デバッグ: 全エントリをチェック
-                if current_new:  # 新ファイル名がある写真のみログ出力
-                    print(f"[DEBUG] チェック: {current_original[:30]}... → new='{current_new}', match='{current_matching}' (型:{type(current_matching).__name__}), land='{current_landscape}'")
-                
-                # identifier を文字列に変換して比較
-                identifier_str = str(identifier)
-                current_matching_str = str(current_matching)
-                
-                # 現在処理中の写真は除外、同じ測量点・同じ景観タイプのみ
-                match_check = (current_matching_str == identifier_str)
-                landscape_check = (current_landscape == landscape_type)
-                not_same_check = (current_original != original_filename)
-                
-                if current_new:  # 新ファイル名がある写真のみ詳細ログ
-                    print(f"[DEBUG]   → マッチング一致: {match_check}, 景観一致: {landscape_check}, 別ファイル: {not_same_check}")
-                
-                if match_check and landscape_check and not_same_check:
-                    existing_photos.append({
-                        'item_id': item_id,
-                        'original': current_original,
-                        'new': current_new,
-                        'values': values
-                    })
-                    print(f"[DEBUG] ★ 既存写真発見: {current_original} → {current_new}")
+            log.debug("既存写真を収集中...")
+            log.debug("検索条件: identifier='%s' (型:%s), landscape_type='%s'",
+                      identifier, type(identifier).__name__, landscape_type)
+            
+            # 同じ測量点・同じ景観タイプの行を索引から取得（現在処理中の写真は除外）
+            item_ids = self._by_matching.get(str(identifier), {}).get(landscape_type, set())
+            item_ids = item_ids - {self._item_by_name.get(original_filename)}
+            for item_id in item_ids:
+                row = self._row_values[item_id]
+                existing_photos.append({
+                    'item_id': item_id,
+                    'original': row.original,
+                    'new': row.new_name,
+                    'values': row
+                })
+                log.debug("★ 既存写真発見: %s → %s", row.original, row.new_name)
             
             # 既存写真がある場合、それらを通し番号に変更
             if existing_photos:
-                print(f"[DEBUG] 既存写真数: {len(existing_photos)}件")
-                # 使用済み番号を収集（予約番号含む）
-                used_numbers = set([1, 2])  # -1, -2は予約
-                print(f"[DEBUG] 初期予約番号: {used_numbers}")
-                
-                # 既存の通し番号を収集
-                for photo in existing_photos:
-                    match = re.search(rf'{re.escape(identifier)}_(\d+){re.escape(ext)}$', photo['new'])
-                    if match:
-                        num = int(match.group(1))
-                        used_numbers.add(num)
-                        print(f"[DEBUG] 通し番号検出: {photo['new']} → 番号{num}")
+                log.debug("既存写真数: %d件", len(existing_photos))
+                # 使用済み番号（既存の通し番号 + 予約番号）はデバッグ表示にしか使わないので、その時だけ集める
+                if log.isEnabledFor(logging.DEBUG):
+                    seq_pattern = self.get_seq_pattern(identifier, ext)
+                    used_numbers = {
+                        int(match.group(1))
+                        for match in (seq_pattern.search(photo['new']) for photo in existing_photos)
+                        if match
+                    }
+                    used_numbers |= {1, 2}  # -1, -2は予約
+                    log.debug("使用済み番号: %s", used_numbers)
                 
                 # 既存写真の新ファイル名を削除（リネーム候補から除外）
-                print(f"[DEBUG] 既存写真の重複チェック開始...")
+                log.debug("既存写真の重複チェック開始...")
                 for photo in existing_photos:
-                    print(f"[DEBUG] チェック中: 既存写真の新ファイル名='{photo['new']}', 基本形='{base_filename}'")
+                    log.debug("チェック中: 既存写真の新ファイル名='%s', 基本形='%s'", photo['new'], base_filename)
                     # 基本形の写真を見つけたら、新ファイル名を空白に設定
                     if photo['new'] == base_filename:
-                        print(f"[DEBUG] ★★★ 重複発見! {photo['new']} と新規ファイル名 {base_filename} が衝突 ★★★")
-                        print(f"[DEBUG] 既存写真の元ファイル名: {photo['original']}")
-                        print(f"[DEBUG] 既存写真の新ファイル名を削除: {photo['new']} → (空白)")
-                        
-                        # 写真の座標を元に戻す
-                        original_photo_name = photo['original']
-                        print(f"[DEBUG] 座標復元処理開始: {original_photo_name}")
-                        
-                        if original_photo_name in self.photo_gps_data:
-                            print(f"[DEBUG] photo_gps_dataに存在します")
-                            gps_data = self.photo_gps_data[original_photo_name]
-                            print(f"[DEBUG] GPS情報のキー: {list(gps_data.keys())}")
-                            
-                            if 'original_x_coord' in gps_data and 'original_y_coord' in gps_data:
-                                old_x = gps_data.get('x_coord', 0)
-                                old_y = gps_data.get('y_coord', 0)
-                                original_x = gps_data['original_x_coord']
-                                original_y = gps_data['original_y_coord']
-                                
-                                print(f"[DEBUG] 現在の座標: X={old_x:.2f}, Y={old_y:.2f}")
-                                print(f"[DEBUG] 元の座標: X={original_x:.2f}, Y={original_y:.2f}")
-                                
-                                gps_data['x_coord'] = original_x
-                                gps_data['y_coord'] = original_y
-                                
-                                print(f"[DEBUG] ★★★ 座標を元に戻しました: ({old_x:.2f}, {old_y:.2f}) → ({original_x:.2f}, {original_y:.2f}) ★★★")
-                            else:
-                                print(f"[DEBUG] ⚠️ 元の座標情報が存在しません")
-                                print(f"[DEBUG] original_x_coord存在: {'original_x_coord' in gps_data}")
-                                print(f"[DEBUG] original_y_coord存在: {'original_y_coord' in gps_data}")
-                        else:
-                            print(f"[DEBUG] ⚠️ photo_gps_dataに存在しません")
-                        
-                        # TreeViewのみ更新（新ファイル名を空白に設定、マッチング情報もクリア）
-                        print(f"[DEBUG] TreeView更新処理開始...")
-                        updated_values = list(photo['values'])
-                        print(f"[DEBUG] 更新前のvalues: {updated_values}")
-                        
-                        updated_values[1] = ""  # 新ファイル名を空白に
-                        updated_values[6] = ""  # マッチングポイントをクリア
-                        updated_values[7] = ""  # 距離をクリア
+                        log.debug("★★★ 重複発見! %s と新規ファイル名 %s が衝突 ★★★", photo['new'], base_filename)
+                        log.debug("既存写真の元ファイル名: %s", photo['original'])
+                        log.debug("既存写真の新ファイル名を削除: %s → (空白)", photo['new'])
                         
-                        print(f"[DEBUG] 更新後のvalues: {updated_values}")
-                        self.photos_tree.item(photo['item_id'], values=updated_values)
-                        print(f"[DEBUG] ★★★ TreeView更新完了: item_id={photo['item_id']}, 新ファイル名=(空白), マッチング情報クリア ★★★")
+                        # 写真の座標を元に戻し、新ファイル名とマッチング情報をクリア
+                        self.revert_photo_coords(photo)
                     else:
-                        print(f"[DEBUG] 一致せず、スキップ")
+                        log.debug("一致せず、スキップ")
             
             # 新しい写真は基本形
-            print(f"[DEBUG] 新規写真のファイル名: {base_filename}")
-            print(f"[DEBUG] ==== create_filename終了 ====\n")
+            log.debug("新規写真のファイル名: %s", base_filename)
+            log.debug("==== create_filename終了 ====")
             return base_filename
         
         else:
             # サフィックスを使用しない場合
-            print(f"[DEBUG] 遠景/近景サフィックス未使用モード")
+            log.debug("遠景/近景サフィックス未使用モード")
             base_filename = f"{identifier}{ext}"
-            print(f"[DEBUG] 基本ファイル名: {base_filename}")
+            log.debug("基本ファイル名: %s", base_filename)
             
             existing_photos = []
-            print(f"[DEBUG] 既存写真を収集中...")
-            print(f"[DEBUG] 検索条件: identifier='{identifier}' (型:{type(identifier).__name__})")
-            
-            for item_id in self.photos_tree.get_children():
-                values = self.photos_tree.item(item_id)['values']
-                current_original = values[0]
-                current_new = values[1]
-                current_matching = values[6]
-                
-                # デバッグ: 全エントリをチェック
-                if current_new:  # 新ファイル名がある写真のみログ出力
-                    print(f"[DEBUG] チェック: {current_original[:30]}... → new='{current_new}', match='{current_matching}' (型:{type(current_matching).__name__})")
-                
-                # identifier を文字列に変換して比較
-                identifier_str = str(identifier)
-                current_matching_str = str(current_matching)
-                
-                match_check = (current_matching_str == identifier_str)
-                not_same_check = (current_original != original_filename)
-                
-                if current_new:  # 新ファイル名がある写真のみ詳細ログ
-                    print(f"[DEBUG]   → マッチング一致: {match_check}, 別ファイル: {not_same_check}")
-                
-                if match_check and not_same_check:
-                    existing_photos.append({
-                        'item_id': item_id,
-                        'original': current_original,
-                        'new': current_new,
-                        'values': values
-                    })
-                    print(f"[DEBUG] ★ 既存写真発見: {current_original} → {current_new}")
+            log.debug("既存写真を収集中...")
+            log.debug("検索条件: identifier='%s' (型:%s)", identifier, type(identifier).__name__)
+            
+            # 同じ測量点の行を景観タイプを問わず索引から取得（現在処理中の写真は除外）
+            item_ids = set().union(*self._by_matching.get(str(identifier), {}).values())
+            item_ids.discard(self._item_by_name.get(original_filename))
+            for item_id in item_ids:
+                row = self._row_values[item_id]
+                existing_photos.append({
+                    'item_id': item_id,
+                    'original': row.original,
+                    'new': row.new_name,
+                    'values': row
+                })
+                log.debug("★ 既存写真発見: %s → %s", row.original, row.new_name)
             
             if existing_photos:
-                print(f"[DEBUG] 既存写真数: {len(existing_photos)}件")
-                used_numbers = set()
-                
+                log.debug("既存写真数: %d件", len(existing_photos))
+                # 使用済み番号はデバッグ表示にしか使わないので、その時だけ集める
+                if log.isEnabledFor(logging.DEBUG):
+                    seq_pattern = self.get_seq_pattern(identifier, ext)
+                    used_numbers = {
+                        int(match.group(1))
+                        for match in (seq_pattern.search(photo['new']) for photo in existing_photos)
+                        if match
+                    }
+                    log.debug("使用済み番号: %s", used_numbers)
+                
+                log.debug("既存写真の重複チェック開始...")
                 for photo in existing_photos:
-                    match = re.search(rf'{re.escape(identifier)}_(\d+){re.escape(ext)}$', photo['new'])
-                    if match:
-                        num = int(match.group(1))
-                        used_numbers.add(num)
-                        print(f"[DEBUG] 通し番号検出: {photo['new']} → 番号{num}")
-                
-                print(f"[DEBUG] 既存写真の重複チェック開始...")
-                for photo in existing_photos:
-                    print(f"[DEBUG] チェック中: 既存写真の新ファイル名='{photo['new']}', 基本形='{base_filename}'")
+                    log.debug("チェック中: 既存写真の新ファイル名='%s', 基本形='%s'", photo['new'], base_filename)
                     if photo['new'] == base_filename:
-                        print(f"[DEBUG] ★★★ 重複発見! {photo['new']} と新規ファイル名 {base_filename} が衝突 ★★★")
-                        print(f"[DEBUG] 既存写真の元ファイル名: {photo['original']}")
-                        print(f"[DEBUG] 既存写真の新ファイル名を削除: {photo['new']} → (空白)")
-                        
-                        # 写真の座標を元に戻す
-                        original_photo_name = photo['original']
-                        print(f"[DEBUG] 座標復元処理開始: {original_photo_name}")
-                        
-                        if original_photo_name in self.photo_gps_data:
-                            print(f"[DEBUG] photo_gps_dataに存在します")
-                            gps_data = self.photo_gps_data[original_photo_name]
-                            print(f"[DEBUG] GPS情報のキー: {list(gps_data.keys())}")
-                            
-                            if 'original_x_coord' in gps_data and 'original_y_coord' in gps_data:
-                                old_x = gps_data.get('x_coord', 0)
-                                old_y = gps_data.get('y_coord', 0)
-                                original_x = gps_data['original_x_coord']
-                                original_y = gps_data['original_y_coord']
-                                
-                                print(f"[DEBUG] 現在の座標: X={old_x:.2f}, Y={old_y:.2f}")
-                                print(f"[DEBUG] 元の座標: X={original_x:.2f}, Y={original_y:.2f}")
-                                
-                                gps_data['x_coord'] = original_x
-                                gps_data['y_coord'] = original_y
-                                
-                                print(f"[DEBUG] ★★★ 座標を元に戻しました: ({old_x:.2f}, {old_y:.2f}) → ({original_x:.2f}, {original_y:.2f}) ★★★")
-                            else:
-                                print(f"[DEBUG] ⚠️ 元の座標情報が存在しません")
-                                print(f"[DEBUG] original_x_coord存在: {'original_x_coord' in gps_data}")
-                                print(f"[DEBUG] original_y_coord存在: {'original_y_coord' in gps_data}")
-                        else:
-                            print(f"[DEBUG] ⚠️ photo_gps_dataに存在しません")
-                        
-                        # TreeViewのみ更新（新ファイル名を空白に設定、マッチング情報もクリア）
-                        print(f"[DEBUG] TreeView更新処理開始...")
-                        updated_values = list(photo['values'])
-                        print(f"[DEBUG] 更新前のvalues: {updated_values}")
+                        log.debug("★★★ 重複発見! %s と新規ファイル名 %s が衝突 ★★★", photo['new'], base_filename)
+                        log.debug("既存写真の元ファイル名: %s", photo['original'])
+                        log.debug("既存写真の新ファイル名を削除: %s → (空白)", photo['new'])
                         
-                        updated_values[1] = ""  # 新ファイル名を空白に
-                        updated_values[6] = ""  # マッチングポイントをクリア
-                        updated_values[7] = ""  # 距離をクリア
-                        
-                        print(f"[DEBUG] 更新後のvalues: {updated_values}")
-                        self.photos_tree.item(photo['item_id'], values=updated_values)
-                        print(f"[DEBUG] ★★★ TreeView更新完了: item_id={photo['item_id']}, 新ファイル名=(空白), マッチング情報クリア ★★★")
+                        # 写真の座標を元に戻し、新ファイル名とマッチング情報をクリア
+                        self.revert_photo_coords(photo)
                     else:
-                        print(f"[DEBUG] 一致せず、スキップ")
+                        log.debug("一致せず、スキップ")
             
-            print(f"[DEBUG] 新規写真のファイル名: {base_filename}")
-            print(f"[DEBUG] ==== create_filename終了 ====\n")
+            log.debug("新規写真のファイル名: %s", base_filename)
+            log.debug("==== create_filename終了 ====")
             return base_filename
     
+    def revert_photo_coords(self, photo):
+        """ファイル名が衝突した既存写真の座標を元に戻し、新ファイル名・マッチング情報をクリア"""
+        gps_data = self.photo_gps_data.get(photo['original'])
+        if gps_data and 'original_x_coord' in gps_data and 'original_y_coord' in gps_data:
+            log.debug("座標を元に戻しました: %s (%s, %s) → (%.2f, %.2f)", photo['original'],
+                      gps_data.get('x_coord'), gps_data.get('y_coord'),
+                      gps_data['original_x_coord'], gps_data['original_y_coord'])
+            gps_data['x_coord'] = gps_data['original_x_coord']
+            gps_data['y_coord'] = gps_data['original_y_coord']
+        else:
+            log.debug("元の座標情報が存在しません: %s", photo['original'])
+        
+        # TreeViewのみ更新（新ファイル名を空白に設定、マッチング情報もクリア）
+        self.set_row(photo['item_id'], photo['values']._replace(
+            new_name="",  # 新ファイル名を空白に
+            matching="",  # マッチングポイントをクリア
+            distance=""  # 距離をクリア
+        ))
+    
+    def get_seq_pattern(self, identifier, ext):
+        """通し番号付きファイル名（{identifier}_番号{ext}）の正規表現を取得（識別子・拡張子ごとにキャッシュ）"""
+        key = (identifier, ext)
+        pattern = self._seq_pat_cache.get(key)
+        if pattern is None:
+            pattern = re.compile(rf'{re.escape(str(identifier))}_(\d+){re.escape(ext)}$')
+            self._seq_pat_cache[key] = pattern
+        return pattern
+    
     def show_photo_context_menu(self, event):
         """写真リストのコンテキストメニューを表示"""
         item = self.photos_tree.identify_row(event.y)
@@ -2103,9 +2392,9 @@ class GPSScanApp:
         if not selected_items:
             return
         
-        values = self.photos_tree.item(selected_items[0])['values']
-        photo_name = values[0]
-        photo_path = os.path.join(self.photo_directory.get(), photo_name)
+        row = self.get_row(selected_items[0])
+        photo_name = row.original
+        photo_path = self._photo_paths.get(photo_name, "")
         
         if not os.path.exists(photo_path):
             messagebox.showerror("エラー", f"写真ファイルが見つかりません:\n{photo_path}")
@@ -2125,13 +2414,13 @@ class GPSScanApp:
                      font=("", 10, "bold")).pack(anchor=tk.W)
             
             # マッチング情報
-            if values[6]:  # マッチングポイント
-                ttk.Label(info_frame, text=f"マッチング: {values[6]} ({values[3]})", 
+            if row.matching:  # マッチングポイント
+                ttk.Label(info_frame, text=f"マッチング: {row.matching} ({row.landscape})", 
                          foreground="blue", font=("", 9)).pack(anchor=tk.W, pady=2)
-                ttk.Label(info_frame, text=f"距離: {values[7]}", 
+                ttk.Label(info_frame, text=f"距離: {row.distance}", 
                          foreground="green", font=("", 9)).pack(anchor=tk.W)
-                if values[1]:  # 新ファイル名
-                    ttk.Label(info_frame, text=f"新ファイル名: {values[1]}", 
+                if row.new_name:  # 新ファイル名
+                    ttk.Label(info_frame, text=f"新ファイル名: {row.new_name}", 
                              foreground="purple", font=("", 9)).pack(anchor=tk.W, pady=2)
             else:
                 ttk.Label(info_frame, text="マッチング: 未設定", 
@@ -2163,16 +2452,21 @@ class GPSScanApp:
             
             img = Image.open(photo_path)
             
-            # ファイルサイズ情報
-            file_size = os.path.getsize(photo_path) / 1024  # KB
-            img_info = f"画像サイズ: {img.width}×{img.height}px, ファイルサイズ: {file_size:.1f}KB"
+            # 画像サイズ・ファイルサイズ情報（写真読み込み時の値があればそれを使う）
+            data = self.photo_gps_data.get(photo_name, {})
+            width = data.get('width', img.width)
+            height = data.get('height', img.height)
+            file_size = data.get('file_size')
+            if file_size is None:
+                file_size = os.path.getsize(photo_path)
+            img_info = f"画像サイズ: {width}×{height}px, ファイルサイズ: {file_size / 1024:.1f}KB"
             ttk.Label(info_frame, text=img_info, font=("", 8), foreground="gray").pack(anchor=tk.W)
             
             # アスペクト比を維持してリサイズ
             max_width, max_height = 880, 550
+            img.draft("RGB", (max_width * 2, max_height * 2))  # 縮小デコード（画像サイズ表示の後に行う）
             img.thumbnail((max_width, max_height), Image.LANCZOS)
             
-            from PIL import ImageTk
             photo = ImageTk.PhotoImage(img)
             
             label = tk.Label(img_frame, image=photo, bg="gray")
@@ -2186,7 +2480,7 @@ class GPSScanApp:
             ttk.Button(button_frame, text="閉じる", 
                       command=preview_window.destroy).pack(side=tk.RIGHT, padx=5)
             
-            if not values[6]:  # マッチング未設定
+            if not row.matching:  # マッチング未設定
                 ttk.Button(button_frame, text="測量点にマッチング", 
                           command=lambda: [preview_window.destroy(), 
                                          self.photos_tree.selection_set(selected_items[0]),
@@ -2204,25 +2498,25 @@ class GPSScanApp:
             return
         
         photo_item = selected_items[0]
-        values = self.photos_tree.item(photo_item)['values']
+        row = self.get_row(photo_item)
         
-        if not values[6]:  # マッチングポイントが空
+        if not row.matching:  # マッチングポイントが空
             messagebox.showinfo("情報", "この写真はまだマッチングされていません")
             return
         
         # 編集ダイアログを表示
         edit_dialog = tk.Toplevel(self.root)
         edit_dialog.title("マッチング編集")
-        edit_dialog.geometry("400x250")
+        self.center_dialog(edit_dialog, 400, 250)  # サイズと画面中央の位置を設定
         edit_dialog.transient(self.root)
         edit_dialog.grab_set()
         
-        ttk.Label(edit_dialog, text=f"写真: {values[0]}", font=("", 10)).pack(pady=10)
-        ttk.Label(edit_dialog, text=f"現在のマッチング: {values[6]}", font=("", 10)).pack(pady=5)
+        ttk.Label(edit_dialog, text=f"写真: {row.original}", font=("", 10)).pack(pady=10)
+        ttk.Label(edit_dialog, text=f"現在のマッチング: {row.matching}", font=("", 10)).pack(pady=5)
         
         # 遠景/近景変更
         ttk.Label(edit_dialog, text="遠景/近景:", font=("", 10)).pack(pady=5)
-        landscape_var = tk.StringVar(value=values[3])
+        landscape_var = tk.StringVar(value=row.landscape)
         ttk.Radiobutton(edit_dialog, text="遠景", variable=landscape_var, value="遠景").pack()
         ttk.Radiobutton(edit_dialog, text="近景", variable=landscape_var, value="近景").pack()
         
@@ -2230,25 +2524,22 @@ class GPSScanApp:
             new_landscape = landscape_var.get()
             
             # 新しいファイル名を生成
-            identifier = values[6]
-            original_filename = values[0]
+            identifier = row.matching
+            original_filename = row.original
             
-            # 対応する測量点を探す
-            matched_point = None
-            for point in self.sim_points:
-                point_id = point['点名'] if self.use_point_name.get() else point['点番']
-                if point_id == identifier or point['点名'] == identifier:
-                    matched_point = point
-                    break
+            # 対応する測量点を探す（点名を優先し、点名モードでなければ点番でも探す）
+            matched_point = self._sim_by_name.get(identifier)
+            if matched_point is None and not self.use_point_name.get():
+                matched_point = self._sim_by_number.get(identifier)
             
             if matched_point:
                 new_filename = self.create_filename(identifier, original_filename, new_landscape, matched_point)
                 
                 # TreeView更新
-                updated_values = list(values)
-                updated_values[1] = new_filename
-                updated_values[3] = new_landscape
-                self.photos_tree.item(photo_item, values=updated_values)
+                self.set_row(photo_item, self.get_row(photo_item)._replace(
+                    new_name=new_filename,
+                    landscape=new_landscape
+                ))
                 
                 edit_dialog.destroy()
                 messagebox.showinfo("成功", "マッチング情報を更新しました")
@@ -2257,12 +2548,12 @@ class GPSScanApp:
                 messagebox.showerror("エラー", "対応する測量点が見つかりません")
         
         ttk.Button(edit_dialog, text="保存", command=save_edit).pack(pady=20)
-        
-        # ダイアログを中央に配置
-        edit_dialog.update_idletasks()
-        x = (edit_dialog.winfo_screenwidth() // 2) - (edit_dialog.winfo_width() // 2)
-        y = (edit_dialog.winfo_screenheight() // 2) - (edit_dialog.winfo_height() // 2)
-        edit_dialog.geometry(f"+{x}+{y}")
+    
+    def center_dialog(self, dialog, width, height):
+        """ダイアログのサイズを設定して画面中央に配置（サイズと位置を同じ値から決める）"""
+        x = (self._screen_w - width) // 2
+        y = (self._screen_h - height) // 2
+        dialog.geometry(f"{width}x{height}+{x}+{y}")
     
     def unmatch_photo(self):
         """写真のマッチングを解除"""
@@ -2272,21 +2563,20 @@ class GPSScanApp:
             return
         
         photo_item = selected_items[0]
-        values = self.photos_tree.item(photo_item)['values']
+        row = self.get_row(photo_item)
         
-        if not values[6]:  # マッチングポイントが空
+        if not row.matching:  # マッチングポイントが空
             messagebox.showinfo("情報", "この写真はマッチングされていません")
             return
         
-        if messagebox.askyesno("確認", f"写真「{values[0]}」のマッチングを解除しますか？"):
+        if messagebox.askyesno("確認", f"写真「{row.original}」のマッチングを解除しますか？"):
             # マッチング情報をクリア
-            updated_values = list(values)
-            updated_values[1] = ""  # 新ファイル名
-            updated_values[3] = "不明"  # 遠景/近景
-            updated_values[6] = ""  # マッチングポイント
-            updated_values[7] = ""  # 距離
-            
-            self.photos_tree.item(photo_item, values=updated_values)
+            self.set_row(photo_item, row._replace(
+                new_name="",  # 新ファイル名
+                landscape="不明",  # 遠景/近景
+                matching="",  # マッチングポイント
+                distance=""  # 距離
+            ))
             
             messagebox.showinfo("成功", "マッチングを解除しました")
             self.update_map_light()
@@ -2314,17 +2604,25 @@ class GPSScanApp:
                 messagebox.showerror("エラー", f"バックアップ作成に失敗しました:\n{str(e)}")
                 return
         
+        # 写真フォルダのファイル一覧を1回だけ取得（ファイルごとの存在確認を避ける）
+        try:
+            with os.scandir(self.photo_directory.get()) as it:
+                src_entries = {entry.name: entry for entry in it if entry.is_file()}
+        except OSError as e:
+            # フォルダが移動・削除された場合などは、各写真を「ファイルが見つかりません」として報告する
+            log.error("写真フォルダの読み込みエラー (%s): %s", self.photo_directory.get(), e)
+            src_entries = {}
+        
         # リネーム対象の写真リストを作成
         rename_list = []
-        for item_id in self.photos_tree.get_children():
-            values = self.photos_tree.item(item_id)['values']
-            if values[1]:  # 新ファイル名が設定されている
-                # 元ファイル名（values[0]）が既にリネーム済みかチェック
-                original_filename = values[0]
-                new_filename = values[1]
+        for item_id, row in self._row_values.items():
+            if row.new_name:  # 新ファイル名が設定されている
+                # 元ファイル名が既にリネーム済みかチェック
+                original_filename = row.original
+                new_filename = row.new_name
                 
                 # 実際のファイルが存在するか確認
-                src_exists = os.path.exists(os.path.join(self.photo_directory.get(), original_filename))
+                src_exists = original_filename in src_entries
                 
                 rename_list.append({
                     'item_id': item_id,
@@ -2349,27 +2647,63 @@ class GPSScanApp:
         error_list = []
         skipped_list = []
         
+        # コピー対象を先に確定
+        candidates = []
         for item in rename_list:
-            try:
-                src_path = os.path.join(self.photo_directory.get(), item['original'])
-                dst_path = os.path.join(output_folder, item['new'])
-                
-                if not os.path.exists(src_path):
-                    error_list.append(f"{item['original']}: ファイルが見つかりません")
-                    continue
-                
-                # 同一ファイル名チェック（パスも含めて比較）
-                if os.path.abspath(src_path) == os.path.abspath(dst_path):
-                    skipped_list.append(f"{item['original']}: 同一ファイル名のためスキップ")
-                    skipped_count += 1
-                    continue
-                
-                # ファイルコピー
-                shutil.copy2(src_path, dst_path)
-                success_count += 1
+            if not item['src_exists']:
+                error_list.append(f"{item['original']}: ファイルが見つかりません")
+                continue
+            
+            src_path = src_entries[item['original']].path
+            dst_path = os.path.join(output_folder, item['new'])
+            
+            # 同一ファイル名チェック（パスも含めて比較）
+            if os.path.abspath(src_path) == os.path.abspath(dst_path):
+                skipped_list.append(f"{item['original']}: 同一ファイル名のためスキップ")
+                skipped_count += 1
+                continue
+            
+            candidates.append((item, src_path, dst_path))
+        
+        # 並列コピーで同じファイルに同時に書き込まないよう、出力先の重複を除外
+        def path_key(path):
+            return os.path.normcase(os.path.abspath(path))
+        
+        src_keys = {path_key(src_entries[item['original']].path)
+                    for item in rename_list if item['src_exists']}
+        dst_counts = Counter(path_key(dst_path) for _, _, dst_path in candidates)
+        copy_jobs = []
+        for item, src_path, dst_path in candidates:
+            dst_key = path_key(dst_path)
+            if dst_counts[dst_key] > 1:
+                error_list.append(f"{item['original']}: 新ファイル名「{item['new']}」が他の写真と重複しています")
+                continue
+            if dst_key in src_keys:
+                # 出力先が写真フォルダの場合、他の写真の元ファイルを上書きしてしまう
+                error_list.append(f"{item['original']}: 新ファイル名「{item['new']}」が他の写真の元ファイルと同じです")
+                continue
+            
+            copy_jobs.append((item, src_path, dst_path))
+        
+        # ファイルコピー（I/O待ちを重ねるため複数スレッドで実行）
+        max_workers = min(8, (os.cpu_count() or 1) * 2)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(fast_copy, src_path, dst_path): item
+                for item, src_path, dst_path in copy_jobs
+            }
+            for done_count, future in enumerate(as_completed(futures), 1):
+                item = futures[future]
+                try:
+                    future.result()
+                    success_count += 1
+                except Exception as e:
+                    error_list.append(f"{item['original']}: {str(e)}")
                 
-            except Exception as e:
-                error_list.append(f"{item['original']}: {str(e)}")
+                self.status_label.config(text=f"リネーム中: {done_count}/{len(copy_jobs)}")
+                self.root.update_idletasks()
+        
+        self.status_label.config(text=f"リネーム完了: {success_count}枚")
         
         # 結果表示
         result_message = f"{success_count}枚の写真をリネームしました"
@@ -2401,18 +2735,22 @@ class GPSScanApp:
         except Exception as e:
             raise Exception(f"バックアップフォルダ作成失敗: {str(e)}")
         
+        # 写真フォルダのファイル一覧を1回だけ取得
+        with os.scandir(self.photo_directory.get()) as it:
+            src_entries = {entry.name: entry for entry in it if entry.is_file()}
+        
         # リネーム対象ファイルをバックアップ
         backup_count = 0
-        for item_id in self.photos_tree.get_children():
-            values = self.photos_tree.item(item_id)['values']
-            if values[1]:  # 新ファイル名が設定されている
-                original_filename = values[0]
-                src_path = os.path.join(self.photo_directory.get(), original_filename)
+        for row in self._row_values.values():
+            if row.new_name:  # 新ファイル名が設定されている
+                original_filename = row.original
+                entry = src_entries.get(original_filename)
                 
-                if os.path.exists(src_path):
+                if entry is not None:
+                    src_path = entry.path
                     dst_path = os.path.join(backup_folder, original_filename)
                     try:
-                        shutil.copy2(src_path, dst_path)
+                        fast_copy(src_path, dst_path)
                         backup_count += 1
                     except Exception as e:
                         raise Exception(f"ファイルバックアップ失敗 {original_filename}: {str(e)}")
@@ -2455,55 +2793,68 @@ class GPSScanApp:
         skipped_count = 0
         no_gps_count = 0
         
-        for item_id in self.photos_tree.get_children():
-            values = list(self.photos_tree.item(item_id)['values'])
-            photo_name = values[0]
+        # マッチング対象（未マッチングでGPS座標がある写真）を集める
+        targets = []
+        px = []
+        py = []
+        for item_id, row in self._row_values.items():
+            photo_name = row.original
             
             # 既にマッチング済みはスキップ
-            if values[6]:
+            if row.matching:
                 skipped_count += 1
                 continue
             
-            if photo_name not in self.photo_gps_data:
-                no_gps_count += 1
-                continue
-            
-            data = self.photo_gps_data[photo_name]
-            if 'x_coord' not in data or 'y_coord' not in data:
+            data = self.photo_gps_data.get(photo_name)
+            if data is None or 'x_coord' not in data or 'y_coord' not in data:
                 no_gps_count += 1
                 continue
             
-            # 最も近い測量点を探す
-            min_distance = float('inf')
-            matched_point = None
-            
-            for point in self.sim_points:
-                dist = math.sqrt((point['X座標'] - data['x_coord']) ** 2 + 
-                               (point['Y座標'] - data['y_coord']) ** 2)
-                if dist < min_distance:
-                    min_distance = dist
-                    matched_point = point
-            
-            if matched_point and min_distance <= distance:
-                identifier = matched_point['点名'] if self.use_point_name.get() else matched_point['点番']
-                
-                # デフォルトで近景
-                new_filename = self.create_filename(identifier, photo_name, "近景", matched_point)
-                
-                values[1] = new_filename
-                values[3] = "近景"
-                values[4] = f"{matched_point['X座標']:.3f}"
-                values[5] = f"{matched_point['Y座標']:.3f}"
-                values[6] = identifier
-                values[7] = f"{min_distance:.1f}m"
-                
-                self.photos_tree.item(item_id, values=values)
-                
-                # GPS座標も更新
-                self.photo_gps_data[photo_name]['x_coord'] = matched_point['X座標']
-                self.photo_gps_data[photo_name]['y_coord'] = matched_point['Y座標']
-                
-                matched_count += 1
+            targets.append((item_id, photo_name, data))
+            px.append(data['x_coord'])
+            py.append(data['y_coord'])
+        
+        # 全写真の最近傍測量点をKD木でまとめて探索（許容距離より遠い場合は距離がinfになる）
+        if targets:
+            # 測量点と同じ原点にずらす
+            photo_xy = np.column_stack((px, py)) - self._sim_origin
+            dists, idxs = self._sim_tree.query(
+                photo_xy, k=1, distance_upper_bound=np.nextafter(distance, np.inf)
+            )
+        else:
+            dists, idxs = [], []
+        
+        # 設定値はループの前に1回だけ読む（Tk変数の.get()はTclへの問い合わせになる）
+        id_key = '点名' if self.use_point_name.get() else '点番'
+        force_special = self.force_point_name_for_special.get()
+        use_suffix = self.use_landscape_suffix.get()
+        
+        # TreeViewは切り離した状態でまとめて更新
+        with self.tree_bulk_update():
+            for (item_id, photo_name, data), min_distance, idx in zip(targets, dists, idxs):
+                if min_distance <= distance:
+                    matched_point = self.sim_points[int(idx)]
+                    # 同じ測量点の識別子は同一の文字列オブジェクトを共有
+                    identifier = sys.intern(str(matched_point[id_key]))
+                    
+                    # デフォルトで近景
+                    new_filename = self.create_filename(identifier, photo_name, "近景", matched_point,
+                                                        force_special, use_suffix)
+                    
+                    self.set_row(item_id, self.get_row(item_id)._replace(
+                        new_name=new_filename,
+                        landscape="近景",
+                        x=f"{matched_point['X座標']:.3f}",
+                        y=f"{matched_point['Y座標']:.3f}",
+                        matching=identifier,
+                        distance=f"{min_distance:.1f}m"
+                    ))
+                    
+                    # GPS座標も更新
+                    data['x_coord'] = matched_point['X座標']
+                    data['y_coord'] = matched_point['Y座標']
+                    
+                    matched_count += 1
         
         # 結果表示
         result_msg = f"GPS自動マッチング完了\n\n"
@@ -2519,19 +2870,15 @@ class GPSScanApp:
     
     def show_statistics(self):
         """マッチング状況の統計を表示"""
-        total = len(list(self.photos_tree.get_children()))
-        matched = 0
-        distant = 0
-        close = 0
-        
-        for item_id in self.photos_tree.get_children():
-            values = self.photos_tree.item(item_id)['values']
-            if values[6]:  # マッチング済み
-                matched += 1
-                if values[3] == "遠景":
-                    distant += 1
-                elif values[3] == "近景":
-                    close += 1
+        # 総数・内訳とも対応表と集計済みの値を使う（TreeViewに問い合わせない）
+        total = len(self._row_values)
+        matched = sum(self._stats.values())
+        distant = self._stats["遠景"]
+        close = self._stats["近景"]
+        
+        use_arbitrary = self.use_arbitrary_coordinates.get()
+        coord_system = self.coordinate_system.get()
+        use_conversion = self.use_gps_conversion.get()
         
         unmatched = total - matched
         match_percent = (matched / total * 100) if total > 0 else 0
@@ -2554,8 +2901,8 @@ class GPSScanApp:
 
 【座標系】
 
-{"任意座標系（ローカル座標系）" if self.use_arbitrary_coordinates.get() else f"平面直角座標系 {self.coordinate_system.get()}系"}
-GPS変換: {"有効" if self.use_gps_conversion.get() else "無効"}
+{"任意座標系（ローカル座標系）" if use_arbitrary else f"平面直角座標系 {coord_system}系"}
+GPS変換: {"有効" if use_conversion else "無効"}
 """
         messagebox.showinfo("統計情報", stats_text)
     
@@ -2573,8 +2920,14 @@ GPS変換: {"有効" if self.use_gps_conversion.get() else "無効"}
         try:
             import json
             settings_path = os.path.join(os.path.dirname(__file__), 'gpsscan_settings.json')
-            with open(settings_path, 'w', encoding='utf-8') as f:
-                json.dump(settings, f, indent=2, ensure_ascii=False)
+            
+            # 整形なしのJSONをバイト列にしてまとめて書き込む
+            if orjson is not None:
+                data = orjson.dumps(settings)
+            else:
+                data = json.dumps(settings, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+            with open(settings_path, 'wb') as f:
+                f.write(data)
             
             messagebox.showinfo("成功", f"設定を保存しました\n\n{settings_path}")
         except Exception as e:
@@ -2590,8 +2943,9 @@ GPS変換: {"有効" if self.use_gps_conversion.get() else "無効"}
                 messagebox.showinfo("情報", "設定ファイルが見つかりません\n\nデフォルト設定を使用します。")
                 return
             
-            with open(settings_path, 'r', encoding='utf-8') as f:
-                settings = json.load(f)
+            with open(settings_path, 'rb') as f:
+                data = f.read()
+            settings = orjson.loads(data) if orjson is not None else json.loads(data)
             
             self.use_point_name.set(settings.get('use_point_name', False))
             self.use_landscape_suffix.set(settings.get('use_landscape_suffix', True))
@@ -2661,6 +3015,14 @@ Copyright (c) 2025
 
 def main():
     """メイン関数"""
+    parser = argparse.ArgumentParser(description="測量写真リネームアプリケーション GPSSCAN")
+    parser.add_argument("--debug", action="store_true", help="詳細なデバッグログを出力する")
+    args = parser.parse_args()
+    
+    # ルートはWARNINGのまま（Pillowやmatplotlibのデバッグログを出さない）、このアプリのログだけ詳細にする
+    logging.basicConfig(level=logging.WARNING, format="%(message)s")
+    log.setLevel(logging.DEBUG if args.debug else logging.INFO)
+    
     root = tk.Tk()
     app = GPSScanApp(root)
     root.mainloop()